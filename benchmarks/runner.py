@@ -0,0 +1,305 @@
+"""
+Benchmark runner for the PyTerpreter. Every program in benchmarks/programs is
+loaded once and executed in-process. The runs are measured for wall time,
+operator throughput, peak memory and per operator counts, the startup (load,
+optimize and compile) is reported separately. The results are compared
+against a stored baseline to flag regressions, timings by their fastest run
+as the median still carries the noise of the machine.
+
+Usage: python benchmarks/runner.py [--tree | --stack] [--repeat N] [--threshold PERCENT]
+                                   [--baseline FILE] [--save] [name ...]
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+Root: str = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(Root, "..", "dist"))
+
+from PyTerpreter import (  # noqa: E402
+    PyTerpreter,
+    PyTerpreterCompiler,
+    PyTerpreterMachine,
+    PyTerpreterProgram,
+)
+
+
+class OperatorCounter:
+    """
+    Counts every evaluated operator while active. Compiled operators are
+    wrapped at compile time, everything the handlers evaluate through the
+    tree engine is counted in execute and the stack machine counts every
+    operation it starts, so all engines report the same work.
+    """
+
+    def __init__(self) -> None:
+        self.counts: dict[str, int] = {}
+        self.__compile: callable = PyTerpreterCompiler.compile
+        self.__execute: callable = PyTerpreter.execute
+        # private to the machine, every operation it evaluates starts there
+        self.__operation: callable = PyTerpreterMachine._PyTerpreterMachine__operation
+
+    def __enter__(self) -> "OperatorCounter":
+        counts: dict[str, int] = self.counts
+        compile: callable = self.__compile
+        execute: callable = self.__execute
+        operation: callable = self.__operation
+
+        def countingCompile(compiler: PyTerpreterCompiler, program: any) -> callable:
+            closure: callable = compile(compiler, program)
+            if not OperatorCounter.IsOperation(program):
+                return closure
+            name: str = program[0]
+
+            def run() -> any:
+                counts[name] = counts.get(name, 0) + 1
+                return closure()
+
+            return run
+
+        def countingExecute(interpreter: PyTerpreter, program: any, *args, **kwargs) -> any:
+            if interpreter.machine is None and OperatorCounter.IsOperation(program):
+                counts[program[0]] = counts.get(program[0], 0) + 1
+            return execute(interpreter, program, *args, **kwargs)
+
+        def countingOperation(machine: PyTerpreterMachine, program: list) -> any:
+            counts[program[0]] = counts.get(program[0], 0) + 1
+            return operation(machine, program)
+
+        PyTerpreterCompiler.compile = countingCompile
+        PyTerpreter.execute = countingExecute
+        PyTerpreterMachine._PyTerpreterMachine__operation = countingOperation
+        return self
+
+    def __exit__(self, *exception) -> None:
+        PyTerpreterCompiler.compile = self.__compile
+        PyTerpreter.execute = self.__execute
+        PyTerpreterMachine._PyTerpreterMachine__operation = self.__operation
+
+    @staticmethod
+    def IsOperation(program: any) -> bool:
+        return isinstance(program, list) and len(program) > 0 and isinstance(program[0], str)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+class BenchmarkRunner:
+    Programs: str = os.path.join(Root, "programs")
+
+    def __init__(self, mode: str, repeat: int) -> None:
+        self.mode: str = mode
+        self.repeat: int = repeat
+        self.results: dict[str, dict] = {}
+
+    @staticmethod
+    def Discover(names: list[str]) -> list[str]:
+        available: list[str] = sorted(
+            file[: -len(".gsc")]
+            for file in os.listdir(BenchmarkRunner.Programs)
+            if file.endswith(".gsc")
+        )
+        for name in names:
+            if name not in available:
+                raise SystemExit(f"Unknown benchmark ({name}).")
+        return names or available
+
+    def __load(self, name: str) -> PyTerpreterProgram:
+        return PyTerpreterProgram.Load(
+            os.path.join(BenchmarkRunner.Programs, f"{name}.gsc"),
+            compiled=self.mode == "compile",
+            stack=self.mode == "stack",
+        )
+
+    def run(self, name: str) -> dict:
+        # counting wraps the closures while compiling, so that program is loaded inside it
+        with OperatorCounter() as counter:
+            output: str = self.__load(name).run().output
+
+        # counting and memory tracing slow the program down, the timed runs are separate
+        program: PyTerpreterProgram = self.__load(name)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            program.run()
+            peakMemory: int = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        # only the runs are timed, the startup of the program is reported on its own
+        durations: list[int] = []
+        for _ in range(self.repeat):
+            gc.collect()
+            start: int = time.perf_counter_ns()
+            program.run()
+            durations.append(time.perf_counter_ns() - start)
+
+        wallTime: float = statistics.median(durations) / 1_000_000_000
+        result: dict = {
+            "wallTime": wallTime,
+            "bestTime": min(durations) / 1_000_000_000,
+            "startup": {phase: value / 1_000_000_000 for phase, value in program.startup.items()},
+            "operations": counter.total,
+            "operationsPerSecond": counter.total / wallTime,
+            "peakMemory": peakMemory,
+            "output": hashlib.sha256(output.encode()).hexdigest(),
+            "counts": dict(sorted(counter.counts.items(), key=lambda item: -item[1])),
+        }
+        self.results[name] = result
+        return result
+
+
+class BaselineComparison:
+    # peak memory changes below this many bytes are noise of small programs
+    MemorySlack: int = 64 * 1024
+
+    def __init__(self, file: str, mode: str, threshold: float) -> None:
+        self.file: str = file
+        self.mode: str = mode
+        self.threshold: float = threshold
+        self.__stored: dict = {}
+        if os.path.exists(file):
+            with open(file, "r") as reader:
+                self.__stored = json.load(reader)
+
+    @property
+    def baseline(self) -> dict[str, dict]:
+        return self.__stored.get(self.mode, {})
+
+    def compare(self, name: str, result: dict) -> list[str]:
+        previous: dict | None = self.baseline.get(name)
+        if previous is None:
+            return []
+        regressions: list[str] = []
+        if result["output"] != previous["output"]:
+            regressions.append("output changed")
+        # fewer operators for the same output is an optimization, more is a regression
+        if result["operations"] > previous["operations"]:
+            regressions.append(f"operations {previous['operations']} -> {result['operations']}")
+        limit: float = 1 + self.threshold
+        # the fastest run is the one least disturbed by the machine, the median is too noisy
+        if result["bestTime"] > previous["bestTime"] * limit:
+            regressions.append(f"best time +{self.__change(previous['bestTime'], result['bestTime'])}%")
+        if (
+            result["peakMemory"] > previous["peakMemory"] * limit
+            and result["peakMemory"] - previous["peakMemory"] > BaselineComparison.MemorySlack
+        ):
+            regressions.append(f"peak memory +{self.__change(previous['peakMemory'], result['peakMemory'])}%")
+        return regressions
+
+    @staticmethod
+    def __change(previous: float, current: float) -> int:
+        return round((current - previous) / previous * 100)
+
+    def save(self, results: dict[str, dict]) -> None:
+        self.__stored[self.mode] = {**self.baseline, **results}
+        with open(self.file, "w") as writer:
+            json.dump(self.__stored, writer, indent=4)
+            writer.write("\n")
+
+
+class BenchmarkReport:
+    Columns: tuple[tuple[str, int], ...] = (
+        ("Benchmark", 22),
+        ("Wall (ms)", 11),
+        ("Best (ms)", 11),
+        ("Baseline (ms)", 13),
+        ("Startup (ms)", 12),
+        ("Operations", 11),
+        ("Ops/sec", 11),
+        ("Peak (KiB)", 11),
+    )
+
+    def __init__(self, comparison: BaselineComparison, top: int) -> None:
+        self.comparison: BaselineComparison = comparison
+        self.top: int = top
+        self.regressions: int = 0
+
+    def header(self) -> None:
+        print("| " + " | ".join(f"{title:<{width}}" for title, width in BenchmarkReport.Columns) + " |")
+        print("|" + "|".join("-" * (width + 2) for _, width in BenchmarkReport.Columns) + "|")
+
+    def row(self, name: str, result: dict) -> None:
+        previous: dict | None = self.comparison.baseline.get(name)
+        baseline: str = "-" if previous is None else f"{previous['bestTime'] * 1000:.2f}"
+        cells: tuple = (
+            name,
+            f"{result['wallTime'] * 1000:.2f}",
+            f"{result['bestTime'] * 1000:.2f}",
+            baseline,
+            f"{result['startup']['total'] * 1000:.2f}",
+            result["operations"],
+            f"{result['operationsPerSecond']:.0f}",
+            f"{result['peakMemory'] / 1024:.1f}",
+        )
+        print(
+            "| "
+            + " | ".join(f"{cell:<{width}}" for cell, (_, width) in zip(cells, BenchmarkReport.Columns))
+            + " |"
+        )
+        operators: str = ", ".join(
+            f"{operator} {count}" for operator, count in list(result["counts"].items())[: self.top]
+        )
+        print(f"|   operators: {operators}")
+        for regression in self.comparison.compare(name, result):
+            self.regressions += 1
+            print(f"|   REGRESSION: {regression}")
+
+    def failure(self, name: str, message: str) -> None:
+        self.regressions += 1
+        print(f"| {name:<{BenchmarkReport.Columns[0][1]}} | FAILED: {message}")
+
+
+def main() -> int:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Run the PyTerpreter benchmarks and compare them against a baseline."
+    )
+    parser.add_argument("names", nargs="*", help="benchmarks to run, all when omitted")
+    engines: argparse._MutuallyExclusiveGroup = parser.add_mutually_exclusive_group()
+    engines.add_argument("--tree", action="store_true", help="use the tree engine instead of --compile")
+    engines.add_argument("--stack", action="store_true", help="use the stack machine instead of --compile")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark (median is reported)")
+    parser.add_argument("--threshold", type=float, default=30, help="allowed slowdown of the fastest run in percent")
+    parser.add_argument("--baseline", default=os.path.join(Root, "baseline.json"), help="baseline file")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--top", type=int, default=6, help="number of operators listed per benchmark")
+    options: argparse.Namespace = parser.parse_args()
+
+    mode: str = "tree" if options.tree else "stack" if options.stack else "compile"
+    runner: BenchmarkRunner = BenchmarkRunner(mode, max(1, options.repeat))
+    comparison: BaselineComparison = BaselineComparison(
+        options.baseline, runner.mode, options.threshold / 100
+    )
+    report: BenchmarkReport = BenchmarkReport(comparison, options.top)
+
+    names: list[str] = BenchmarkRunner.Discover(options.names)
+    print(f"Mode: {runner.mode}, repeat: {runner.repeat}, threshold: {options.threshold:g}%")
+    report.header()
+    for name in names:
+        try:
+            result: dict = runner.run(name)
+        except SystemExit as error:
+            report.failure(name, str(error))
+            continue
+        report.row(name, result)
+
+    if options.save:
+        comparison.save(runner.results)
+        print(f"Baseline saved to {options.baseline}.")
+    elif not comparison.baseline:
+        print(f"No baseline for mode {runner.mode}, store one with --save.")
+    elif report.regressions:
+        print(f"{report.regressions} regression(s) against {options.baseline}.")
+    return 1 if report.regressions and not options.save else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
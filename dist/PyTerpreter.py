@@ -1,10 +1,16 @@
 from __future__ import annotations
+import functools
+import hashlib
+import io
 import json
+import marshal
+import operator
+import os
 import sys
-from datetime import datetime
-from copy import deepcopy
-from uuid import uuid4
-import uuid
+import time
+import types
+import itertools
+from array import array as TypedArray
 
 Illegal = "illegal"
 
@@ -54,9 +60,11 @@ class PyTerpreterEnsure:
 
     @staticmethod
     def Includes(value: any, multi: any) -> None:
-        PyTerpreterEnsure.Ensure(
-            value in multi, f"Non-existent property occurred ({value} -> {multi})."
-        )
+        # the message lists every possibility, it is only formatted on failure
+        if value not in multi:
+            PyTerpreterEnsure.Ensure(
+                False, f"Non-existent property occurred ({value} -> {multi})."
+            )
 
     @staticmethod
     def Usage(environment: PyTerpreterEnvironment, value: str) -> None:
@@ -96,16 +104,8 @@ class PyTerpreterVariable:
         PyTerpreterEnsure.NotIllegal(name)
         value: any = interpreter.execute(args[1])
         PyTerpreterEnsure.NotIllegal(value)
-        return PyTerpreterVariable.__StoreDownwards(
-            name, value, interpreter.environment
-        )
-
-    @staticmethod
-    def __StoreDownwards(name: str, value: any, top: PyTerpreterEnvironment) -> Illegal:
-        if top.exists(name) or top.next is None:
-            top.store(name, value)
-            return Illegal
-        return PyTerpreterVariable.__StoreDownwards(name, value, top.next)
+        interpreter.scope.store(name, value)
+        return Illegal
 
     @staticmethod
     def Get(interpreter: PyTerpreter, args: list) -> any:
@@ -113,15 +113,7 @@ class PyTerpreterVariable:
         name: str = interpreter.execute(args[0])
         PyTerpreterEnsure.Type(name, str)
         PyTerpreterEnsure.NotIllegal(name)
-        return PyTerpreterVariable.__RetrieveUpwards(
-            name, interpreter.environment.lowest()
-        )
-
-    @staticmethod
-    def __RetrieveUpwards(name: str, bottom: PyTerpreterEnvironment) -> any:
-        if bottom.exists(name) or bottom.previous is None:
-            return bottom.retrieve(name)
-        return PyTerpreterVariable.__RetrieveUpwards(name, bottom.previous)
+        return interpreter.scope.retrieve(name)
 
     Operations: dict = {
         "set": Set,
@@ -198,7 +190,7 @@ class PyTerpreterSystem:
         PyTerpreterEnsure.Length(args, 1)
         value: any = interpreter.execute(args[0])
         PyTerpreterEnsure.NotIllegal(value)
-        print(value)
+        print(value, file=interpreter.output)
         return Illegal
 
     Operations: dict = {
@@ -301,7 +293,8 @@ class PyTerpreterConditional:
         elif length == 3:
             program = args[2]
         if program is not None:
-            PyTerpreterEnsure.Sequence(program)
+            if not interpreter.validated:
+                PyTerpreterEnsure.Sequence(program)
             interpreter.execute(program, "if")
         return Illegal
 
@@ -353,6 +346,23 @@ class PyTerpreterDictionary:
 
 
 class PyTerpreterArray:
+    """
+    Plain arrays are lists of any values. Typed arrays only hold int or float
+    numbers in an array.array, their bulk operations process the whole array
+    natively in a single operator instead of one interpreted operator per
+    element. Results of bulk operations are new arrays, only fill works in place.
+    """
+
+    Types: dict[str, str] = {"int": "q", "float": "d"}
+
+    Comparisons: dict = {
+        "equal": operator.eq,
+        "less": operator.lt,
+        "greater": operator.gt,
+        "lessEqual": operator.le,
+        "greaterEqual": operator.ge,
+    }
+
     @staticmethod
     def Array(interpreter: PyTerpreter, args: list) -> list:
         PyTerpreterEnsure.Length(args, 1)
@@ -363,28 +373,216 @@ class PyTerpreterArray:
     @staticmethod
     def ArraySet(interpreter: PyTerpreter, args: list) -> Illegal:
         PyTerpreterEnsure.Length(args, 3)
-        array: list = interpreter.execute(args[0])
-        PyTerpreterEnsure.Type(array, list)
+        array: list | TypedArray = PyTerpreterArray.__Array(interpreter, args[0])
         index: int = interpreter.execute(args[1])
         PyTerpreterEnsure.Type(index, int)
         value: any = interpreter.execute(args[2])
         PyTerpreterEnsure.NotIllegal(value)
+        if type(array) is TypedArray:
+            PyTerpreterArray.Element(array.typecode, value)
         array[index] = value
         return Illegal
 
     @staticmethod
     def ArrayGet(interpreter: PyTerpreter, args: list) -> any:
         PyTerpreterEnsure.Length(args, 2)
-        array: list = interpreter.execute(args[0])
-        PyTerpreterEnsure.Type(array, list)
+        array: list | TypedArray = PyTerpreterArray.__Array(interpreter, args[0])
         index: int = interpreter.execute(args[1])
         PyTerpreterEnsure.Type(index, int)
         return array[index]
 
+    @staticmethod
+    def ArrayTyped(interpreter: PyTerpreter, args: list) -> TypedArray:
+        PyTerpreterEnsure.Length(args, 2)
+        kind: str = interpreter.execute(args[0])
+        PyTerpreterEnsure.Type(kind, str)
+        PyTerpreterEnsure.Includes(kind, PyTerpreterArray.Types)
+        code: str = PyTerpreterArray.Types[kind]
+        source: int | list | TypedArray = interpreter.execute(args[1])
+        PyTerpreterEnsure.Type(source, (int, list, TypedArray))
+        if type(source) is int:
+            return TypedArray(code, [0]) * source
+        for value in source:
+            PyTerpreterArray.Element(code, value)
+        return PyTerpreterArray.Create(code, source)
+
+    @staticmethod
+    def ArrayLength(interpreter: PyTerpreter, args: list) -> int:
+        PyTerpreterEnsure.Length(args, 1)
+        return len(PyTerpreterArray.__Array(interpreter, args[0]))
+
+    @staticmethod
+    def ArrayFill(interpreter: PyTerpreter, args: list) -> Illegal:
+        PyTerpreterEnsure.Length(args, 2)
+        array: list | TypedArray = PyTerpreterArray.__Array(interpreter, args[0])
+        value: any = interpreter.execute(args[1])
+        PyTerpreterEnsure.NotIllegal(value)
+        if type(array) is TypedArray:
+            PyTerpreterArray.Element(array.typecode, value)
+            array[:] = TypedArray(array.typecode, [value]) * len(array)
+        else:
+            array[:] = [value] * len(array)
+        return Illegal
+
+    @staticmethod
+    def ArrayRange(interpreter: PyTerpreter, args: list) -> TypedArray:
+        PyTerpreterEnsure.Length(args, (2, 3))
+        bounds: list[int] = [interpreter.execute(arg) for arg in args]
+        [PyTerpreterEnsure.Type(bound, int) for bound in bounds]
+        PyTerpreterEnsure.Ensure(
+            len(bounds) == 2 or bounds[2] != 0, "Invalid range step occurred (0)."
+        )
+        return PyTerpreterArray.Create("q", range(*bounds))
+
+    @staticmethod
+    def ArraySlice(interpreter: PyTerpreter, args: list) -> list | TypedArray:
+        PyTerpreterEnsure.Length(args, 3)
+        array: list | TypedArray = PyTerpreterArray.__Array(interpreter, args[0])
+        start: int = interpreter.execute(args[1])
+        PyTerpreterEnsure.Type(start, int)
+        stop: int = interpreter.execute(args[2])
+        PyTerpreterEnsure.Type(stop, int)
+        return array[start:stop]
+
+    @staticmethod
+    def ArrayConcat(interpreter: PyTerpreter, args: list) -> list | TypedArray:
+        PyTerpreterEnsure.Length(args, 2)
+        a: list | TypedArray = PyTerpreterArray.__Array(interpreter, args[0])
+        b: list | TypedArray = PyTerpreterArray.__Array(interpreter, args[1])
+        PyTerpreterEnsure.Type(b, type(a))
+        if type(a) is list or a.typecode == b.typecode:
+            return a + b
+        return PyTerpreterArray.Create("d", itertools.chain(a, b))
+
+    @staticmethod
+    def ArrayAdd(interpreter: PyTerpreter, args: list) -> TypedArray:
+        PyTerpreterEnsure.Length(args, 2)
+        return PyTerpreterArray.__Elementwise(interpreter, args, operator.add)
+
+    @staticmethod
+    def ArrayMultiply(interpreter: PyTerpreter, args: list) -> TypedArray:
+        PyTerpreterEnsure.Length(args, 2)
+        return PyTerpreterArray.__Elementwise(interpreter, args, operator.mul)
+
+    @staticmethod
+    def ArrayCompare(interpreter: PyTerpreter, args: list) -> TypedArray:
+        PyTerpreterEnsure.Length(args, 3)
+        comparison: str = interpreter.execute(args[0])
+        PyTerpreterEnsure.Type(comparison, str)
+        PyTerpreterEnsure.Includes(comparison, PyTerpreterArray.Comparisons)
+        function: callable = PyTerpreterArray.Comparisons[comparison]
+        # comparisons result in an int array of 1 and 0, so matches can be summed
+        return PyTerpreterArray.__Elementwise(interpreter, args[1:], function, "q")
+
+    @staticmethod
+    def ArraySum(interpreter: PyTerpreter, args: list) -> int | float:
+        PyTerpreterEnsure.Length(args, 1)
+        return sum(PyTerpreterArray.__Typed(interpreter, args[0]))
+
+    @staticmethod
+    def ArrayMin(interpreter: PyTerpreter, args: list) -> int | float:
+        PyTerpreterEnsure.Length(args, 1)
+        return min(PyTerpreterArray.__Filled(interpreter, args[0]))
+
+    @staticmethod
+    def ArrayMax(interpreter: PyTerpreter, args: list) -> int | float:
+        PyTerpreterEnsure.Length(args, 1)
+        return max(PyTerpreterArray.__Filled(interpreter, args[0]))
+
+    @staticmethod
+    def ArraySort(interpreter: PyTerpreter, args: list) -> TypedArray:
+        PyTerpreterEnsure.Length(args, 1)
+        array: TypedArray = PyTerpreterArray.__Typed(interpreter, args[0])
+        return TypedArray(array.typecode, sorted(array))
+
+    @staticmethod
+    def ArrayMap(interpreter: PyTerpreter, args: list) -> list | TypedArray:
+        PyTerpreterEnsure.Length(args, 2)
+        function: PyTerpreterCallable = interpreter.execute(args[0])
+        PyTerpreterEnsure.Instance(function, PyTerpreterCallable)
+        array: list | TypedArray = PyTerpreterArray.__Array(interpreter, args[1])
+        values: list = [
+            PyTerpreterFunction.Invoke(interpreter, function, [value])
+            for value in array
+        ]
+        if type(array) is list:
+            return values
+        # the element type follows the results, mapping ints to floats is allowed
+        if all(type(value) is int for value in values):
+            return PyTerpreterArray.Create("q", values)
+        for value in values:
+            PyTerpreterArray.Element("d", value)
+        return PyTerpreterArray.Create("d", values)
+
+    @staticmethod
+    def Element(code: str, value: any) -> None:
+        PyTerpreterEnsure.Type(value, int if code == "q" else (int, float))
+
+    @staticmethod
+    def Create(code: str, values: any) -> TypedArray:
+        try:
+            return TypedArray(code, values)
+        except OverflowError:
+            PyTerpreterEnsure.Ensure(False, "Typed array overflow occurred.")
+
+    @staticmethod
+    def __Array(interpreter: PyTerpreter, argument: any) -> list | TypedArray:
+        array: list | TypedArray = interpreter.execute(argument)
+        PyTerpreterEnsure.Type(array, (list, TypedArray))
+        return array
+
+    @staticmethod
+    def __Typed(interpreter: PyTerpreter, argument: any) -> TypedArray:
+        array: TypedArray = interpreter.execute(argument)
+        PyTerpreterEnsure.Type(array, TypedArray)
+        return array
+
+    @staticmethod
+    def __Filled(interpreter: PyTerpreter, argument: any) -> TypedArray:
+        array: TypedArray = PyTerpreterArray.__Typed(interpreter, argument)
+        PyTerpreterEnsure.Ensure(len(array) > 0, "Empty array occurred.")
+        return array
+
+    @staticmethod
+    def __Elementwise(
+        interpreter: PyTerpreter,
+        args: list,
+        function: callable,
+        code: str | None = None,
+    ) -> TypedArray:
+        a: TypedArray = PyTerpreterArray.__Typed(interpreter, args[0])
+        b: TypedArray | int | float = interpreter.execute(args[1])
+        PyTerpreterEnsure.Type(b, (TypedArray, int, float))
+        if type(b) is TypedArray:
+            PyTerpreterEnsure.Ensure(
+                len(a) == len(b),
+                f"Invalid array length occurred ({len(a)} -> {len(b)}).",
+            )
+            integral: bool = a.typecode == "q" and b.typecode == "q"
+            values: any = map(function, a, b)
+        else:
+            integral = a.typecode == "q" and type(b) is int
+            values = map(function, a, itertools.repeat(b, len(a)))
+        return PyTerpreterArray.Create(code or ("q" if integral else "d"), values)
+
     Operations: dict = {
         "array": Array,
         "arraySet": ArraySet,
         "arrayGet": ArrayGet,
+        "arrayTyped": ArrayTyped,
+        "arrayLength": ArrayLength,
+        "arrayFill": ArrayFill,
+        "arrayRange": ArrayRange,
+        "arraySlice": ArraySlice,
+        "arrayConcat": ArrayConcat,
+        "arrayAdd": ArrayAdd,
+        "arrayMultiply": ArrayMultiply,
+        "arrayCompare": ArrayCompare,
+        "arraySum": ArraySum,
+        "arrayMin": ArrayMin,
+        "arrayMax": ArrayMax,
+        "arraySort": ArraySort,
+        "arrayMap": ArrayMap,
     }
 
 
@@ -393,10 +591,9 @@ class PyTerpreterLoop:
     def While(interpreter: PyTerpreter, args: list) -> Illegal:
         PyTerpreterEnsure.Length(args, 2)
         program: any = args[1]
-        PyTerpreterEnsure.Sequence(program)
+        if not interpreter.validated:
+            PyTerpreterEnsure.Sequence(program)
         while PyTerpreterLoop.__Condition(interpreter, args[0]):
-            if interpreter.environment.lowest().kill:
-                break
             interpreter.execute(program, "while")
         return Illegal
 
@@ -410,12 +607,11 @@ class PyTerpreterLoop:
     def Repeat(interpreter: PyTerpreter, args: list) -> Illegal:
         PyTerpreterEnsure.Length(args, 2)
         count: int = args[0]
-        PyTerpreterEnsure.Type(count, int)
         program: any = args[1]
-        PyTerpreterEnsure.Sequence(program)
+        if not interpreter.validated:
+            PyTerpreterEnsure.Type(count, int)
+            PyTerpreterEnsure.Sequence(program)
         for _ in range(count):
-            if interpreter.environment.lowest().kill:
-                break
             interpreter.execute(program, "repeat")
         return Illegal
 
@@ -423,167 +619,302 @@ class PyTerpreterLoop:
 
 
 def trace(function) -> callable:
+    @functools.wraps(function)
     def _inner(*args) -> any:
-        identity: str = str(int(str(uuid.uuid4().int)[:6]))
-        interpreter: PyTerpreter = args[0]
-        functionName: str = interpreter.trace.getFunctionName(args[1])
-        interpreter.trace.beforeCall(identity, functionName)
-        value: any = function(*args)
-        interpreter.trace.afterCall(identity, functionName)
-        return value
+        tracer: PyTerpreterTrace = args[0].trace
+        if not tracer.enabled:
+            return function(*args)
+        identity: int = tracer.beforeCall(tracer.getFunctionName(args[1]))
+        try:
+            return function(*args)
+        finally:
+            tracer.afterCall(identity)
 
     return _inner
 
 
+class PyTerpreterCallable:
+    __slots__ = ("parameters", "program", "mount")
+
+    def __init__(
+        self,
+        parameters: list[str],
+        program: list,
+        mount: PyTerpreterEnvironment | None = None,
+    ) -> None:
+        self.parameters: tuple[str, ...] = tuple(parameters)
+        self.program: list = program
+        self.mount: PyTerpreterEnvironment | None = mount
+
+    def bind(self, mount: PyTerpreterEnvironment) -> PyTerpreterCallable:
+        return PyTerpreterCallable(self.parameters, self.program, mount)
+
+    def __repr__(self) -> str:
+        return repr(["function", list(self.parameters), self.program])
+
+
+class PyTerpreterReturn(Exception):
+    def __init__(self, value: any) -> None:
+        super().__init__()
+        self.value: any = value
+
+
+class PyTerpreterTailCall(Exception):
+    def __init__(self, call: list, function: PyTerpreterCallable, values: list) -> None:
+        super().__init__()
+        self.call: list = call
+        self.function: PyTerpreterCallable = function
+        self.values: list = values
+
+
 class PyTerpreterFunction:
     @staticmethod
-    def Function(interpreter: PyTerpreter, args: list) -> list:
+    def Function(interpreter: PyTerpreter, args: list) -> PyTerpreterCallable:
         PyTerpreterEnsure.Length(args, 2)
         parameters: list[str] = args[0]
-        PyTerpreterEnsure.Type(parameters, list)
-        [PyTerpreterEnsure.Type(parameter, str) for parameter in parameters]
         program: list = args[1]
-        PyTerpreterEnsure.Sequence(program)
-        return ["function", parameters, program]
+        if not interpreter.validated:
+            PyTerpreterEnsure.Type(parameters, list)
+            [PyTerpreterEnsure.Type(parameter, str) for parameter in parameters]
+            PyTerpreterEnsure.Sequence(program)
+        return PyTerpreterCallable(parameters, program)
 
     @staticmethod
     @trace
     def Call(interpreter: PyTerpreter, args: list) -> any:
         PyTerpreterEnsure.Length(args, 2)
-        function: list = deepcopy(interpreter.execute(args[0]))
-        PyTerpreterEnsure.Operation(function, "function")
+        function: PyTerpreterCallable = interpreter.execute(args[0])
+        PyTerpreterEnsure.Instance(function, PyTerpreterCallable)
         arguments: list = args[1]
         PyTerpreterEnsure.Type(arguments, list)
-        mountIndex, mount = PyTerpreterFunction.__FetchMount(interpreter, function[2])
-        PyTerpreterFunction.__InjectArguments(
-            interpreter, function, arguments, mountIndex
-        )
-        return interpreter.execute(function[2], "function", False, None, mount)
+        values: list = [
+            PyTerpreterFunction.Argument(interpreter, argument)
+            for argument in arguments
+        ]
+        return PyTerpreterFunction.Invoke(interpreter, function, values)
 
     @staticmethod
-    def Mount(interpreter: PyTerpreter, args: list) -> Illegal:
-        PyTerpreterEnsure.Length(args, 1)
-        id: str = args[0]
-        PyTerpreterEnsure.Type(id, str)
-        PyTerpreterEnsure.NotIllegal(id)
-        return Illegal
+    def Argument(interpreter: PyTerpreter, argument: any) -> any:
+        value: any = interpreter.execute(argument)
+        PyTerpreterEnsure.NotIllegal(value)
+        return value
 
     @staticmethod
-    def __FetchMount(
-        interpreter: PyTerpreter, program: list
-    ) -> tuple[int, PyTerpreterEnvironment | None]:
-        mount: PyTerpreterEnvironment | None = None
-        index: int | None = PyTerpreterFunction.__FetchMountIndex(program)
-        if index is None:
-            index = -1
-        else:
-            id: str = program[index][1]
-            mount = PyTerpreterFunction.__FetchEnvironmentById(
-                interpreter.environment, id
+    def Invoke(
+        interpreter: PyTerpreter, function: PyTerpreterCallable, values: list
+    ) -> any:
+        # the stack machine raises a tail call for returned calls,
+        # handlers loop on it as well
+        carried: list[PyTerpreterEnvironment] = []
+        owned: list[PyTerpreterEnvironment] = []
+        try:
+            while True:
+                frame: tuple = PyTerpreterFunction.Enter(interpreter, function, values)
+                try:
+                    interpreter.executeFunction(function)
+                    return None
+                except PyTerpreterReturn as signal:
+                    return signal.value
+                except PyTerpreterTailCall as tail:
+                    function, values = tail.function, tail.values
+                    frame = PyTerpreterFunction.Carry(frame, function, carried, owned)
+                finally:
+                    PyTerpreterFunction.Leave(interpreter, *frame)
+        finally:
+            PyTerpreterFunction.Release(carried, owned)
+
+    @staticmethod
+    def Enter(
+        interpreter: PyTerpreter, function: PyTerpreterCallable, values: list
+    ) -> tuple[PyTerpreterEnvironment, PyTerpreterEnvironment | None]:
+        parameters: tuple[str, ...] = function.parameters
+        PyTerpreterEnsure.Ensure(
+            len(values) == len(parameters), "Illegal parameter argument missmatch."
+        )
+        if interpreter.depth >= interpreter.maxDepth:
+            PyTerpreterEnsure.Ensure(
+                False, f"Maximum call depth exceeded ({interpreter.maxDepth})."
             )
-        return index, mount
+        mount: PyTerpreterEnvironment | None = function.mount
+        # an object that is already mounted by an outer method stays attached
+        if mount is not None and mount.previous is not None:
+            mount = None
+        if mount is not None:
+            mount.attach(interpreter.scope.lowest)
+        environment: PyTerpreterEnvironment = PyTerpreterEnvironment("function")
+        for i in range(len(parameters)):
+            environment.store(parameters[i], values[i])
+        environment.attach(interpreter.scope.lowest)
+        interpreter.depth += 1
+        return environment, mount
 
     @staticmethod
-    def __FetchMountIndex(program: list) -> int | None:
-        PyTerpreterEnsure.Sequence(program)
-        for i in range(len(program)):
-            operation: list = program[i]
-            if operation[0] == "mount":
-                return i
-        return None
+    def Leave(
+        interpreter: PyTerpreter,
+        environment: PyTerpreterEnvironment,
+        mount: PyTerpreterEnvironment | None,
+    ) -> None:
+        interpreter.depth -= 1
+        scope: PyTerpreterScope = interpreter.scope
+        # an error inside the call can leave environments attached below the frame
+        while scope.lowest is not environment and scope.lowest.previous is not None:
+            scope.lowest.detach()
+        environment.destroy()
+        if mount is not None:
+            mount.detach()
 
     @staticmethod
-    def __FetchEnvironmentById(
-        environment: PyTerpreterEnvironment, id: str
-    ) -> PyTerpreterEnvironment | None:
-        target: PyTerpreterEnvironment | None = environment.fetchById(id)
-        if target is not None:
-            return target
-        if environment.next is not None:
-            return PyTerpreterFunction.__FetchEnvironmentById(environment.next, id)
-        return None
+    def Carry(
+        frame: tuple,
+        function: PyTerpreterCallable,
+        carried: list[PyTerpreterEnvironment],
+        owned: list[PyTerpreterEnvironment],
+    ) -> tuple:
+        environment, mount = frame
+        # objects of the returning frame can be the callee or its arguments,
+        # they are destroyed when the tail calls end like the frame would be
+        for name, value in list(environment.fields.items()):
+            if isinstance(value, PyTerpreterEnvironment):
+                environment.delete(name)
+                owned.append(value)
+        # an unbound callee keeps seeing the object of the returning method
+        if mount is None or function.mount is not None:
+            return frame
+        carried.append(mount)
+        return environment, None
 
     @staticmethod
-    def __InjectArguments(
-        interpreter: PyTerpreter, function: list, arguments: list, mountIndex: int
+    def Release(
+        carried: list[PyTerpreterEnvironment], owned: list[PyTerpreterEnvironment]
     ) -> None:
-        parameters: list[str] = function[1]
-        PyTerpreterEnsure.Ensure(
-            len(arguments) == len(parameters), "Illegal parameter argument missmatch."
-        )
-        program: list = function[2]
-        for i in range(len(parameters)):
-            value: any = interpreter.execute(arguments[i])
-            operation: list = ["set", parameters[i], value]
-            program.insert(mountIndex + 1, operation)
+        for mount in reversed(carried):
+            mount.detach()
+        for environment in owned:
+            # an object handed on as argument went with the frame of its callee
+            if not environment.destroyed:
+                environment.destroy()
 
     @staticmethod
     def Return(interpreter: PyTerpreter, args: list) -> Illegal:
-        environment: PyTerpreterEnvironment = (
-            PyTerpreterFunction.__FetchFunctionEnvironment(
-                interpreter.environment.lowest()
-            )
+        PyTerpreterEnsure.Ensure(
+            interpreter.depth > 0, "Illegal use of return outside function."
         )
         PyTerpreterEnsure.Length(args, 1)
         value: any = interpreter.execute(args[0])
         PyTerpreterEnsure.NotIllegal(value)
-        environment.store("return", value)
-        environment.terminate()
-
-    @staticmethod
-    def __FetchFunctionEnvironment(
-        environment: PyTerpreterEnvironment,
-    ) -> PyTerpreterEnvironment:
-        if environment.usage == "function":
-            return environment
-        PyTerpreterEnsure.Ensure(
-            environment.previous is not None, f"Illegal use of return outside function."
-        )
-        return PyTerpreterFunction.__FetchFunctionEnvironment(environment.previous)
+        raise PyTerpreterReturn(value)
 
     Operations: dict = {
         "function": Function,
         "call": Call,
-        "mount": Mount,
         "return": Return,
     }
 
 
+class PyTerpreterClassTable:
+    """
+    A class linearized once when it is defined: the merged field initializers,
+    the shared method callables, the inherit table and the constructor.
+    Instances only hold their own fields and refer back to this table.
+    """
+
+    __slots__ = ("program", "operations", "fields", "methods", "inherited")
+
+    def __init__(
+        self,
+        interpreter: PyTerpreter,
+        ancestor: PyTerpreterClassTable | None,
+        program: list,
+    ) -> None:
+        if not interpreter.validated:
+            for operation in program:
+                PyTerpreterEnsure.Length(operation, 3)
+                PyTerpreterEnsure.Type(operation[1], str)
+                PyTerpreterEnsure.NotIllegal(operation[1])
+        self.program: list = program
+        self.operations: list = list(program)
+        self.inherited: dict[str, any] = {}
+        if ancestor is not None:
+            self.__mergeAncestor(ancestor)
+        fields: dict[str, any] = {}
+        self.methods: dict[str, PyTerpreterCallable] = {}
+        for _, name, value in self.operations:
+            if PyTerpreterClassTable.IsFunction(value):
+                self.methods[name] = interpreter.execute(value)
+                fields.pop(name, None)
+            else:
+                fields[name] = value
+                self.methods.pop(name, None)
+        self.fields: tuple[tuple[str, any], ...] = tuple(fields.items())
+        if "constructor" in fields:
+            PyTerpreterEnsure.Operation(fields["constructor"], "function")
+
+    def __mergeAncestor(self, ancestor: PyTerpreterClassTable) -> None:
+        # overwritten ancestor entries are cached, the oldest one wins
+        self.inherited.update(ancestor.inherited)
+        functions: set[str] = {
+            name
+            for _, name, value in self.operations
+            if PyTerpreterClassTable.IsFunction(value)
+        }
+        merged: list = []
+        for operation in reversed(ancestor.operations):
+            name: str = operation[1]
+            if name in functions:
+                self.inherited.setdefault(name, operation[2])
+                continue
+            merged.append(operation)
+            if PyTerpreterClassTable.IsFunction(operation[2]):
+                functions.add(name)
+        merged.reverse()
+        self.operations = merged + self.operations
+
+    @staticmethod
+    def IsFunction(value: any) -> bool:
+        return isinstance(value, list) and len(value) > 0 and value[0] == "function"
+
+    @property
+    def constructor(self) -> PyTerpreterCallable | None:
+        return self.methods.get("constructor")
+
+    def __repr__(self) -> str:
+        return repr(["class", self.program])
+
+
 class PyTerpreterClass:
     @staticmethod
-    def Class(interpreter: PyTerpreter, args: list) -> list:
+    def Class(interpreter: PyTerpreter, args: list) -> PyTerpreterClassTable:
         length: int = PyTerpreterEnsure.Length(args, (1, 2))
         program: list = args[-1]
-        PyTerpreterEnsure.Class(program)
+        if not interpreter.validated:
+            PyTerpreterEnsure.Class(program)
+        ancestor: PyTerpreterClassTable | None = None
         if length == 2:
-            ancestor: list = args[0]
-            PyTerpreterEnsure.Type(ancestor, list)
-            return ["class", ancestor, program]
-        return ["class", program]
+            ancestor = interpreter.execute(args[0])
+            PyTerpreterEnsure.Instance(ancestor, PyTerpreterClassTable)
+        return PyTerpreterClassTable(interpreter, ancestor, program)
 
     @staticmethod
-    def Inherit(interpreter: PyTerpreter, args: list) -> list:
+    def Inherit(interpreter: PyTerpreter, args: list) -> any:
         PyTerpreterEnsure.Length(args, 1)
         name: str = interpreter.execute(args[0])
         PyTerpreterEnsure.Type(name, str)
         PyTerpreterEnsure.NotIllegal(name)
-        collisionCache: list | None = PyTerpreterClass.__RetrieveCacheUpwards(
-            interpreter.environment.lowest()
+        environment: PyTerpreterEnvironment | None = interpreter.scope.lowest
+        while environment is not None and environment.table is None:
+            environment = environment.previous
+        PyTerpreterEnsure.Ensure(
+            environment is not None, "Illegal use of inherit outside object."
         )
-        PyTerpreterEnsure.Type(collisionCache, list)
-        for item in collisionCache:
-            if item[0] == name:
-                return item[1]
+        inherited: dict = environment.table.inherited
         PyTerpreterEnsure.Ensure(
-            False,
-            f"Illegal inherit of unknown function name ({name} -> {collisionCache}).",
+            name in inherited,
+            f"Illegal inherit of unknown function name ({name} -> {list(inherited)}).",
         )
-
-    @staticmethod
-    def __RetrieveCacheUpwards(environment: PyTerpreterEnvironment) -> list | None:
-        if environment.cache is not None or environment.previous is None:
-            return environment.cache
-        return PyTerpreterClass.__RetrieveCacheUpwards(environment.previous)
+        value: any = interpreter.execute(inherited[name])
+        if isinstance(value, PyTerpreterCallable):
+            return value.bind(environment)
+        return value
 
     Operations: dict = {"class": Class, "inherit": Inherit}
 
@@ -592,83 +923,40 @@ class PyTerpreterObject:
     @staticmethod
     def Object(interpreter: PyTerpreter, args: list) -> PyTerpreterEnvironment:
         PyTerpreterEnsure.Length(args, 2)
-        instantiate: list = interpreter.execute(args[0])
-        PyTerpreterEnsure.Operation(instantiate, "class")
-        program, collisionCache = PyTerpreterObject.__Inherit(interpreter, instantiate)
-        PyTerpreterEnsure.Class(program)
+        table: PyTerpreterClassTable = interpreter.execute(args[0])
+        PyTerpreterEnsure.Instance(table, PyTerpreterClassTable)
         arguments: list = args[1]
         PyTerpreterEnsure.Type(arguments, list)
-        environment: PyTerpreterEnvironment = interpreter.autoEnvironment("object")
-        environment.setCache(collisionCache)
-        PyTerpreterObject.__Mount(program, environment.id)
-        interpreter.execute(program, "object", True, environment)
-        # temporary save for mount of constructor to find object
-        interpreter.environment.store(environment.id, environment)
-        constructor: list | None = PyTerpreterObject.__GetConstructor(program)
-        if constructor is not None:
-            interpreter.execute(["call", constructor, arguments])
-        interpreter.environment.delete(environment.id)
+        environment: PyTerpreterEnvironment = PyTerpreterEnvironment("object")
+        environment.table = table
+        environment.attach(interpreter.scope.lowest)
+        try:
+            for name, value in table.fields:
+                environment.store(name, interpreter.execute(value))
+        finally:
+            environment.detach()
+        if table.constructor is not None:
+            PyTerpreterObject.__Construct(interpreter, args, environment)
         return environment
 
     @staticmethod
-    def __Inherit(interpreter: PyTerpreter, definition: list) -> tuple[list, list]:
-        PyTerpreterEnsure.Operation(definition, "class")
-        if len(definition) == 2:
-            collisionCache: list = []
-            return deepcopy(definition[1]), collisionCache
-        ancestor: list = interpreter.execute(definition[1])
-        return PyTerpreterObject.__MergeAncestor(
-            PyTerpreterObject.__Inherit(interpreter, ancestor), deepcopy(definition[2])
-        )
-
-    @staticmethod
-    def __MergeAncestor(
-        ancestor: tuple[list, list], program: list
-    ) -> tuple[list, list]:
-        PyTerpreterEnsure.Class(program)
-        ancestorProgram: list = ancestor[0]
-        PyTerpreterEnsure.Class(ancestorProgram)
-        result: list = program
-        collisionCache: list = ancestor[1]
-        ancestorProgram.reverse()
-        for operation in ancestorProgram:
-            name: str = operation[1]
-            if PyTerpreterObject.__CollisionInClass(result, name):
-                collisionCache.append((name, operation[2]))
-                continue
-            result.insert(0, operation)
-        return result, collisionCache
-
-    @staticmethod
-    def __CollisionInClass(program: list, name: str) -> bool:
-        PyTerpreterEnsure.Class(program)
-        for operation in program:
-            if (
-                operation[1] == name
-                and isinstance(operation[2], list)
-                and operation[2][0] == "function"
-            ):
-                return True
-        return False
-
-    @staticmethod
-    def __Mount(program: list, id: str) -> None:
-        PyTerpreterEnsure.Class(program)
-        for operation in program:
-            value: any = operation[2]
-            if isinstance(value, list) and value[0] == "function":
-                function: list = value[2]
-                function.insert(0, ["mount", id])
+    @trace
+    def __Construct(
+        interpreter: PyTerpreter, args: list, environment: PyTerpreterEnvironment
+    ) -> None:
+        values: list = [
+            PyTerpreterFunction.Argument(interpreter, argument) for argument in args[1]
+        ]
+        constructor: PyTerpreterCallable = environment.table.constructor
+        PyTerpreterFunction.Invoke(interpreter, constructor.bind(environment), values)
 
     @staticmethod
-    def __GetConstructor(program: list) -> list | None:
-        PyTerpreterEnsure.Class(program)
-        constructor: list | None = None
-        for operation in program:
-            if operation[1] == "constructor":
-                constructor = operation[2]
-                PyTerpreterEnsure.Operation(constructor, "function")
-        return constructor
+    def Member(environment: PyTerpreterEnvironment, name: str) -> any:
+        # own fields, set ones included, shadow the methods of the class table
+        table: PyTerpreterClassTable | None = environment.table
+        if table is not None and name in table.methods and not environment.exists(name):
+            return table.methods[name].bind(environment)
+        return environment.retrieve(name)
 
     @staticmethod
     def ObjectSet(interpreter: PyTerpreter, args: list) -> Illegal:
@@ -691,7 +979,7 @@ class PyTerpreterObject:
         name: str = interpreter.execute(args[1])
         PyTerpreterEnsure.Type(name, str)
         PyTerpreterEnsure.NotIllegal(name)
-        return environment.retrieve(name)
+        return PyTerpreterObject.Member(environment, name)
 
     Operations: dict = {
         "object": Object,
@@ -700,182 +988,294 @@ class PyTerpreterObject:
     }
 
 
-class PyTerpreterEnvironment:
-    def __init__(
-        self, usage: str, previous: PyTerpreterEnvironment | None = None
-    ) -> None:
-        self.__id: str = str(uuid4())
-        self.__usage: str = usage
-        self.__previous: PyTerpreterEnvironment | None = None
-        self.__next: PyTerpreterEnvironment | None = None
-        self.__fields: dict = {}
-        self.__cache: list | None = None
-        self.__kill: bool = False
-        self.__isDestroyed: bool = False
-        self.attach(previous)
+class PyTerpreterScope:
+    """
+    Shallow binding of the environment tree. Every name maps to a cell, the
+    stack of attached environments defining it ordered from the root down,
+    so get reads the last and set writes the first entry without walking
+    the tree. Cells are created once per name and shared with the compiler.
+    Methods stay in the class table of their objects, the attached objects
+    are kept in order and a method name resolves to the closest one.
+    """
 
-    @property
-    def id(self) -> str:
-        self.__notDestroyed()
-        return self.__id
+    __slots__ = ("root", "lowest", "cells", "objects")
 
-    @property
-    def usage(self) -> str:
-        self.__notDestroyed()
-        return self.__usage
+    def __init__(self, root: PyTerpreterEnvironment) -> None:
+        self.root: PyTerpreterEnvironment = root
+        self.lowest: PyTerpreterEnvironment = root
+        self.cells: dict[str, list[PyTerpreterEnvironment]] = {}
+        self.objects: list[PyTerpreterEnvironment] = []
 
-    @property
-    def previous(self) -> PyTerpreterEnvironment | None:
-        self.__notDestroyed()
-        return self.__previous
+    def cell(self, name: str) -> list[PyTerpreterEnvironment]:
+        cell: list | None = self.cells.get(name)
+        if cell is None:
+            cell = self.cells[name] = []
+        return cell
 
-    @property
-    def next(self) -> PyTerpreterEnvironment | None:
-        self.__notDestroyed()
-        return self.__next
+    def retrieve(self, name: str) -> any:
+        cell: list | None = self.cells.get(name)
+        if self.objects:
+            holder: PyTerpreterEnvironment | None = PyTerpreterScope.__Holder(
+                name, reversed(self.objects)
+            )
+            if holder is not None and (not cell or cell[-1].depth < holder.depth):
+                # bound like objectGet, the method keeps its object when it is passed on
+                return holder.table.methods[name].bind(holder)
+        if not cell:
+            return self.root.retrieve(name)
+        return cell[-1].fields[name]
 
-    @property
-    def cache(self) -> list | None:
-        self.__notDestroyed()
-        return self.__cache
+    def store(self, name: str, value: any) -> None:
+        cell: list | None = self.cells.get(name)
+        if self.objects:
+            # like set on a field, set on a method name writes the outermost object
+            holder: PyTerpreterEnvironment | None = PyTerpreterScope.__Holder(
+                name, self.objects
+            )
+            if holder is not None and (not cell or holder.depth < cell[0].depth):
+                return holder.store(name, value)
+        if not cell:
+            return self.lowest.store(name, value)
+        cell[0].store(name, value)
 
-    @property
-    def kill(self) -> bool:
-        self.__notDestroyed()
-        return self.__kill
+    def hasMethod(self, name: str) -> bool:
+        return PyTerpreterScope.__Holder(name, self.objects) is not None
 
-    def setPrevious(self, previous: PyTerpreterEnvironment | None) -> None:
-        self.__notDestroyed()
-        self.__previous = previous
+    @staticmethod
+    def __Holder(name: str, objects: any) -> PyTerpreterEnvironment | None:
+        for environment in objects:
+            if name in environment.table.methods:
+                return environment
+        return None
+
+    def bind(self, environment: PyTerpreterEnvironment, name: str) -> None:
+        cell: list = self.cell(name)
+        if not cell or cell[-1].depth < environment.depth:
+            cell.append(environment)
+            return
+        index: int = 0
+        while cell[index].depth < environment.depth:
+            index += 1
+        cell.insert(index, environment)
+
+    def unbind(self, environment: PyTerpreterEnvironment, name: str) -> None:
+        self.cells[name].remove(environment)
+
+    def push(self, environment: PyTerpreterEnvironment) -> None:
+        self.lowest = environment
+        if environment.table is not None:
+            self.objects.append(environment)
+        for name in environment.fields:
+            self.cell(name).append(environment)
+
+    def pop(self, environment: PyTerpreterEnvironment) -> None:
+        self.lowest = environment.previous
+        if environment.table is not None:
+            self.objects.pop()
+        cells: dict = self.cells
+        for name in environment.fields:
+            cells[name].pop()
 
-    def setNext(self, next: PyTerpreterEnvironment | None) -> None:
-        self.__notDestroyed()
-        self.__next = next
+
+class PyTerpreterEnvironment:
+    __slots__ = (
+        "id",
+        "usage",
+        "previous",
+        "next",
+        "fields",
+        "table",
+        "depth",
+        "scope",
+        "destroyed",
+    )
+
+    Identities: itertools.count = itertools.count()
+
+    def __init__(
+        self, usage: str, previous: PyTerpreterEnvironment | None = None
+    ) -> None:
+        self.id: int = next(PyTerpreterEnvironment.Identities)
+        self.usage: str = usage
+        self.previous: PyTerpreterEnvironment | None = None
+        self.next: PyTerpreterEnvironment | None = None
+        self.fields: dict = {}
+        self.table: PyTerpreterClassTable | None = None
+        self.depth: int = 0
+        self.scope: PyTerpreterScope | None = None
+        self.destroyed: bool = False
+        if previous is not None:
+            self.attach(previous)
+
+    @staticmethod
+    def Root(usage: str) -> PyTerpreterEnvironment:
+        root: PyTerpreterEnvironment = PyTerpreterEnvironment(usage)
+        root.scope = PyTerpreterScope(root)
+        return root
 
     def attach(self, previous: PyTerpreterEnvironment | None):
         self.__notDestroyed()
-        if self.previous is not None:
-            return
-        self.setPrevious(previous)
-        if self.previous is None:
+        if self.previous is not None or previous is None:
             return
         PyTerpreterEnsure.Ensure(
-            self.previous.next is None,
+            previous.next is None,
             "Illegal environment tree insertion.",
         )
-        self.previous.setNext(self)
+        self.previous = previous
+        previous.next = self
+        self.depth = previous.depth + 1
+        self.scope = previous.scope
+        if self.scope is not None:
+            self.scope.push(self)
 
     def lowest(self) -> PyTerpreterEnvironment:
-        self.__notDestroyed()
-        if self.next is None:
-            return self
-        return self.next.lowest()
+        if self.scope is not None:
+            return self.scope.lowest
+        environment: PyTerpreterEnvironment = self
+        while environment.next is not None:
+            environment = environment.next
+        return environment
 
     def store(self, name: str, value: any) -> None:
         self.__notDestroyed()
         PyTerpreterEnsure.Type(name, str)
         PyTerpreterEnsure.NotIllegal(name)
         PyTerpreterEnsure.NotIllegal(value)
-        self.__fields[name] = value
+        fields: dict = self.fields
+        if name not in fields and self.scope is not None:
+            self.scope.bind(self, name)
+        fields[name] = value
 
     def exists(self, name: str) -> bool:
         self.__notDestroyed()
         PyTerpreterEnsure.Type(name, str)
         PyTerpreterEnsure.NotIllegal(name)
-        return name in self.__fields
+        return name in self.fields
 
     def retrieve(self, name: str) -> any:
         self.__notDestroyed()
         PyTerpreterEnsure.Type(name, str)
         PyTerpreterEnsure.NotIllegal(name)
-        PyTerpreterEnsure.Includes(name, self.__fields)
-        return self.__fields[name]
+        PyTerpreterEnsure.Includes(name, self.fields)
+        return self.fields[name]
 
     def delete(self, name: str) -> None:
         self.__notDestroyed()
         PyTerpreterEnsure.Type(name, str)
         PyTerpreterEnsure.NotIllegal(name)
-        PyTerpreterEnsure.Includes(name, self.__fields)
-        del self.__fields[name]
-
-    def setCache(self, cache: list) -> None:
-        self.__cache = cache
-
-    def fetchById(self, id: str) -> PyTerpreterEnvironment | None:
-        if self.id == id:
-            return self
-        for value in self.__fields.values():
-            if isinstance(value, PyTerpreterEnvironment) and value.id == id:
-                return value
-        return None
+        PyTerpreterEnsure.Includes(name, self.fields)
+        if self.scope is not None:
+            self.scope.unbind(self, name)
+        del self.fields[name]
 
     def detach(self) -> None:
         self.__notDestroyed()
-        if self.previous is None:
+        previous: PyTerpreterEnvironment | None = self.previous
+        if previous is None:
             return
-        self.previous.setNext(None)
-        self.setPrevious(None)
-
-    def terminate(self) -> None:
-        self.__notDestroyed()
-        self.__kill = True
-        if self.next is not None:
-            self.next.terminate()
+        if self.scope is not None:
+            self.scope.pop(self)
+        previous.next = None
+        self.previous = None
+        self.scope = None
+        self.depth = 0
 
     def destroy(self) -> None:
+        # objects held in fields are destroyed along,
+        # iteratively as they can nest deeply
+        pending: list[PyTerpreterEnvironment] = [self]
+        while pending:
+            environment: PyTerpreterEnvironment = pending.pop()
+            environment.__release()
+            pending.extend(
+                value
+                for value in environment.fields.values()
+                if isinstance(value, PyTerpreterEnvironment)
+            )
+            environment.fields.clear()
+
+    def __release(self) -> None:
         self.__notDestroyed()
         self.detach()
         PyTerpreterEnsure.Ensure(
             self.next is None,
             "Illegal environment tree removal.",
         )
-        # self.terminate()
-        # if self.next is not None:
-        #     self.next.destroy()
-        self.__isDestroyed = True
-        for value in self.__fields.values():
-            if isinstance(value, PyTerpreterEnvironment):
-                value.destroy()
-        self.__fields.clear()
+        self.destroyed = True
 
     def __notDestroyed(self) -> None:
-        PyTerpreterEnsure.Ensure(
-            not self.__isDestroyed, "Illegal use of destroyed environment."
-        )
+        if self.destroyed:
+            PyTerpreterEnsure.Ensure(False, "Illegal use of destroyed environment.")
 
 
 class PyTerpreterTrace:
-    def __init__(self, cliArgs) -> None:
-        PyTerpreterEnsure.Length(cliArgs, (2, 4))
-        self.__outputTrace: bool = len(cliArgs) == 4 and cliArgs[2] == "--trace"
-        self.__traced: list = []
-        if self.__outputTrace:
-            self.__fileName: str = cliArgs[3]
-
-    def beforeCall(self, identity, functionName) -> None:
-        log: tuple = (
-            identity,
-            functionName,
-            "start",
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"),
-        )
-        self.__traced.append(log)
-
-    def afterCall(self, identity, functionName) -> None:
-        log: tuple = (
-            identity,
-            functionName,
-            "stop",
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"),
-        )
-        self.__traced.append(log)
+    """
+    Streams call records to the trace file. Every traced call writes a start
+    record "s id parent name ns" and a stop record "e id ns", where ns is
+    the perf_counter_ns offset to the start of the run and name an index
+    declared once by "n index name". Records are buffered and written every
+    Capacity records. With a sample rate n only every n-th call is recorded,
+    its parent is then the closest recorded caller. The file is only opened
+    by the first flush, a program that fails to load leaves it untouched.
+    """
+
+    Header: str = "#PyTerpreterTrace 2"
+    Capacity: int = 4096
+
+    def __init__(self, fileName: str | None, sample: int = 1) -> None:
+        PyTerpreterEnsure.Ensure(sample >= 1, f"Invalid trace sample rate ({sample}).")
+        self.enabled: bool = fileName is not None
+        self.__sample: int = sample
+        self.__seen: int = 0
+        self.__identities: itertools.count = itertools.count(1)
+        self.__stack: list[int] = [0]
+        self.__names: dict[str, int] = {}
+        self.__buffer: list[str] = [PyTerpreterTrace.Header]
+        self.__fileName: str | None = fileName
+        self.__file: any = None
+        self.__closed: bool = False
+        self.__origin: int = time.perf_counter_ns()
+
+    def beforeCall(self, functionName: str) -> int:
+        self.__seen += 1
+        if self.__seen % self.__sample:
+            return 0
+        nameId: int | None = self.__names.get(functionName)
+        if nameId is None:
+            nameId = self.__names[functionName] = len(self.__names)
+            self.__write(f"n {nameId} {functionName}")
+        identity: int = next(self.__identities)
+        timestamp: int = time.perf_counter_ns() - self.__origin
+        self.__write(f"s {identity} {self.__stack[-1]} {nameId} {timestamp}")
+        self.__stack.append(identity)
+        return identity
+
+    def afterCall(self, identity: int) -> None:
+        if not identity:
+            return
+        timestamp: int = time.perf_counter_ns() - self.__origin
+        self.__stack.pop()
+        self.__write(f"e {identity} {timestamp}")
+
+    def __write(self, record: str) -> None:
+        self.__buffer.append(record)
+        if len(self.__buffer) >= PyTerpreterTrace.Capacity:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.enabled or self.__closed or not self.__buffer:
+            return
+        if self.__file is None:
+            self.__file = open(self.__fileName, "w")
+        self.__file.write("\n".join(self.__buffer) + "\n")
+        self.__buffer.clear()
 
     def postExecution(self) -> None:
-        if not self.__outputTrace:
+        if not self.enabled or self.__closed:
             return
-        with open(self.__fileName, "w") as file:
-            for traceLog in self.__traced:
-                file.write(",".join(traceLog) + "\n")
+        self.flush()
+        self.__closed = True
+        self.__file.close()
 
     @staticmethod
     def getFunctionName(args: list) -> str:
@@ -888,9 +1288,946 @@ class PyTerpreterTrace:
         return "[anonymous]"
 
 
-class PyTerpreter:
+class PyTerpreterArguments:
+    Flags: dict = {
+        "--trace": 1,
+        "--sample": 1,
+        "--compile": 0,
+        "--cache": 1,
+        "--stack": 0,
+        "--depth": 1,
+        "--dump": 1,
+    }
+
     def __init__(self, cliArgs: list[str]) -> None:
-        self.environment: PyTerpreterEnvironment = PyTerpreterEnvironment("global")
+        PyTerpreterEnsure.Ensure(len(cliArgs) >= 2, "Missing program file argument.")
+        self.file: str = cliArgs[1]
+        self.__options: dict = {}
+        index: int = 2
+        while index < len(cliArgs):
+            flag: str = cliArgs[index]
+            PyTerpreterEnsure.Includes(flag, PyTerpreterArguments.Flags)
+            arity: int = PyTerpreterArguments.Flags[flag]
+            PyTerpreterEnsure.Ensure(
+                index + arity < len(cliArgs), f"Missing value for argument ({flag})."
+            )
+            self.__options[flag] = cliArgs[index + arity] if arity else True
+            index += 1 + arity
+
+    def option(self, flag: str, default: any = None) -> any:
+        PyTerpreterEnsure.Includes(flag, PyTerpreterArguments.Flags)
+        return self.__options.get(flag, default)
+
+    def number(self, flag: str, default: int | None = None) -> int | None:
+        value: str | int | None = self.option(flag, default)
+        if value is None:
+            return None
+        PyTerpreterEnsure.Ensure(
+            isinstance(value, int) or value.isdigit(),
+            f"Invalid number for argument ({flag} -> {value}).",
+        )
+        return int(value)
+
+
+class PyTerpreterCompiler:
+    """
+    Compiles a loaded program once into a tree of closures. Operator lookup,
+    arity and shape checks happen at compile time, the closures only evaluate.
+    Operators without a specialized closure fall back to their handler.
+    """
+
+    Unary: dict = {
+        "absolute": abs,
+        "not": operator.not_,
+    }
+
+    Binary: dict = {
+        "add": operator.add,
+        "subtract": operator.sub,
+        "multiply": operator.mul,
+        "divide": operator.truediv,
+        "power": operator.pow,
+        "and": lambda a, b: a and b,
+        "or": lambda a, b: a or b,
+        "equal": operator.eq,
+        "less": operator.lt,
+        "greater": operator.gt,
+        "lessEqual": operator.le,
+        "greaterEqual": operator.ge,
+    }
+
+    def __init__(self, interpreter: PyTerpreter, operations: dict) -> None:
+        self.__interpreter: PyTerpreter = interpreter
+        self.__operations: dict = operations
+        self.__bodies: dict[int, tuple] = {}
+        self.__compilers: dict = {
+            "set": self.__compileSet,
+            "get": self.__compileGet,
+            "print": self.__compilePrint,
+            "if": self.__compileIf,
+            "dictionary": self.__compileDictionary,
+            "dictionarySet": self.__compileDictionarySet,
+            "dictionaryGet": self.__compileDictionaryGet,
+            "dictionaryMerge": self.__compileDictionaryMerge,
+            "array": self.__compileArray,
+            "arraySet": self.__compileArraySet,
+            "arrayGet": self.__compileArrayGet,
+            "while": self.__compileWhile,
+            "repeat": self.__compileRepeat,
+            "function": self.__compileFunction,
+            "call": self.__compileCall,
+            "return": self.__compileReturn,
+            "objectSet": self.__compileObjectSet,
+            "objectGet": self.__compileObjectGet,
+        }
+
+    def compile(self, program: any) -> callable:
+        PyTerpreterEnsure.NotIllegal(program)
+        if isinstance(program, list):
+            if len(program) == 0 or isinstance(program[0], list):
+                return self.__compileSequence(program, None)
+            return self.__compileOperation(program)
+        return lambda: program
+
+    def __compileOperation(self, program: list) -> callable:
+        operator: str = program[0]
+        PyTerpreterEnsure.Type(operator, str)
+        args: list = program[1:]
+        if operator in PyTerpreterCompiler.Unary:
+            return self.__compileUnary(args, PyTerpreterCompiler.Unary[operator])
+        if operator in PyTerpreterCompiler.Binary:
+            return self.__compileBinary(args, PyTerpreterCompiler.Binary[operator])
+        if operator in self.__compilers:
+            return self.__compilers[operator](args)
+        PyTerpreterEnsure.Includes(operator, self.__operations)
+        handler: callable = self.__operations[operator]
+        interpreter: PyTerpreter = self.__interpreter
+        return lambda: handler(interpreter, args)
+
+    def __compileSequence(self, sequence: list, usage: str | None) -> callable:
+        PyTerpreterEnsure.Sequence(sequence)
+        statements: tuple = tuple(self.compile(program) for program in sequence)
+        interpreter: PyTerpreter = self.__interpreter
+
+        def run() -> Illegal:
+            environment: PyTerpreterEnvironment = interpreter.autoEnvironment(usage)
+            try:
+                for statement in statements:
+                    statement()
+            finally:
+                environment.destroy()
+            return Illegal
+
+        return run
+
+    def __compileValue(self, program: any) -> callable:
+        value: callable = self.compile(program)
+
+        def run() -> any:
+            result: any = value()
+            if result == Illegal:
+                PyTerpreterEnsure.NotIllegal(result)
+            return result
+
+        return run
+
+    def __compileName(self, program: any) -> callable:
+        if not isinstance(program, list):
+            PyTerpreterEnsure.Type(program, str)
+            PyTerpreterEnsure.NotIllegal(program)
+            return lambda: program
+        value: callable = self.compile(program)
+
+        def run() -> str:
+            name: str = value()
+            PyTerpreterEnsure.Type(name, str)
+            PyTerpreterEnsure.NotIllegal(name)
+            return name
+
+        return run
+
+    def __compileTyped(self, program: any, should: type | tuple) -> callable:
+        value: callable = self.compile(program)
+        if type(should) is tuple:
+
+            def run() -> any:
+                result: any = value()
+                if type(result) not in should:
+                    PyTerpreterEnsure.Type(result, should)
+                return result
+
+            return run
+
+        def run() -> any:
+            result: any = value()
+            if type(result) is not should:
+                PyTerpreterEnsure.Type(result, should)
+            return result
+
+        return run
+
+    def __compileUnary(self, args: list, function: callable) -> callable:
+        PyTerpreterEnsure.Length(args, 1)
+        a: callable = self.__compileValue(args[0])
+        return lambda: function(a())
+
+    def __compileBinary(self, args: list, function: callable) -> callable:
+        PyTerpreterEnsure.Length(args, 2)
+        a: callable = self.__compileValue(args[0])
+        b: callable = self.__compileValue(args[1])
+        return lambda: function(a(), b())
+
+    def __compileSet(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 2)
+        value: callable = self.__compileValue(args[1])
+        scope: PyTerpreterScope = self.__interpreter.scope
+        if isinstance(args[0], list):
+            name: callable = self.__compileName(args[0])
+
+            def dynamic() -> Illegal:
+                key: str = name()
+                scope.store(key, value())
+                return Illegal
+
+            return dynamic
+        key: str = self.__compileName(args[0])()
+        cell: list[PyTerpreterEnvironment] = scope.cell(key)
+        objects: list[PyTerpreterEnvironment] = scope.objects
+
+        def run() -> Illegal:
+            result: any = value()
+            if cell and not (objects and scope.hasMethod(key)):
+                cell[0].fields[key] = result
+            else:
+                scope.store(key, result)
+            return Illegal
+
+        return run
+
+    def __compileGet(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 1)
+        scope: PyTerpreterScope = self.__interpreter.scope
+        if isinstance(args[0], list):
+            name: callable = self.__compileName(args[0])
+            return lambda: scope.retrieve(name())
+        key: str = self.__compileName(args[0])()
+        cell: list[PyTerpreterEnvironment] = scope.cell(key)
+        objects: list[PyTerpreterEnvironment] = scope.objects
+
+        def run() -> any:
+            # methods of attached objects are not in the cells,
+            # only their names take the scope
+            if cell and not (objects and scope.hasMethod(key)):
+                return cell[-1].fields[key]
+            return scope.retrieve(key)
+
+        return run
+
+    def __compilePrint(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 1)
+        value: callable = self.__compileValue(args[0])
+        interpreter: PyTerpreter = self.__interpreter
+
+        def run() -> Illegal:
+            print(value(), file=interpreter.output)
+            return Illegal
+
+        return run
+
+    def __compileIf(self, args: list) -> callable:
+        length: int = PyTerpreterEnsure.Length(args, (2, 3))
+        condition: callable = self.__compileValue(args[0])
+        then: callable = self.__compileSequence(args[1], "if")
+        otherwise: callable | None = None
+        if length == 3:
+            otherwise = self.__compileSequence(args[2], "if")
+
+        def run() -> Illegal:
+            if condition():
+                then()
+            elif otherwise is not None:
+                otherwise()
+            return Illegal
+
+        return run
+
+    def __compileDictionary(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 0)
+        return lambda: {}
+
+    def __compileDictionarySet(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 3)
+        dictionary: callable = self.__compileTyped(args[0], dict)
+        key: callable = self.__compileValue(args[1])
+        value: callable = self.__compileValue(args[2])
+
+        def run() -> Illegal:
+            target: dict = dictionary()
+            target[key()] = value()
+            return Illegal
+
+        return run
+
+    def __compileDictionaryGet(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 2)
+        dictionary: callable = self.__compileTyped(args[0], dict)
+        key: callable = self.__compileValue(args[1])
+        return lambda: dictionary().get(key(), None)
+
+    def __compileDictionaryMerge(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 2)
+        a: callable = self.__compileTyped(args[0], dict)
+        b: callable = self.__compileTyped(args[1], dict)
+        return lambda: {**a(), **b()}
+
+    def __compileArray(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 1)
+        size: callable = self.__compileTyped(args[0], int)
+        return lambda: [None] * size()
+
+    def __compileArraySet(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 3)
+        array: callable = self.__compileTyped(args[0], (list, TypedArray))
+        index: callable = self.__compileTyped(args[1], int)
+        value: callable = self.__compileValue(args[2])
+
+        def run() -> Illegal:
+            target: list | TypedArray = array()
+            position: int = index()
+            result: any = value()
+            if type(target) is not list:
+                PyTerpreterArray.Element(target.typecode, result)
+            target[position] = result
+            return Illegal
+
+        return run
+
+    def __compileArrayGet(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 2)
+        array: callable = self.__compileTyped(args[0], (list, TypedArray))
+        index: callable = self.__compileTyped(args[1], int)
+
+        def run() -> any:
+            target: list | TypedArray = array()
+            return target[index()]
+
+        return run
+
+    def __compileWhile(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 2)
+        condition: callable = self.__compileValue(args[0])
+        program: callable = self.__compileSequence(args[1], "while")
+
+        def run() -> Illegal:
+            while condition():
+                program()
+            return Illegal
+
+        return run
+
+    def __compileRepeat(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 2)
+        count: int = args[0]
+        PyTerpreterEnsure.Type(count, int)
+        program: callable = self.__compileSequence(args[1], "repeat")
+
+        def run() -> Illegal:
+            for _ in range(count):
+                program()
+            return Illegal
+
+        return run
+
+    def __compileFunction(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 2)
+        parameters: list[str] = args[0]
+        PyTerpreterEnsure.Type(parameters, list)
+        [PyTerpreterEnsure.Type(parameter, str) for parameter in parameters]
+        program: list = args[1]
+        self.__compileBody(program)
+        function: PyTerpreterCallable = PyTerpreterCallable(parameters, program)
+        return lambda: function
+
+    def __compileBody(self, program: list) -> tuple:
+        PyTerpreterEnsure.Sequence(program)
+        statements: tuple = tuple(self.compile(operation) for operation in program)
+        # the program is kept alive with its statements, so its id stays unique
+        self.__bodies[id(program)] = (program, statements)
+        return statements
+
+    def compileProgram(self, program: any) -> callable:
+        # the top level runs in the current environment, its variables outlive the run
+        if not isinstance(program, list) or (
+            program and not isinstance(program[0], list)
+        ):
+            return self.compile(program)
+        PyTerpreterEnsure.Sequence(program)
+        statements: tuple = tuple(self.compile(operation) for operation in program)
+
+        def run() -> Illegal:
+            for statement in statements:
+                statement()
+            return Illegal
+
+        return run
+
+    def executeFunction(self, function: PyTerpreterCallable) -> None:
+        # functions created by the handlers (class methods) compile on first call
+        body: tuple | None = self.__bodies.get(id(function.program))
+        if body is None or body[0] is not function.program:
+            statements: tuple = self.__compileBody(function.program)
+        else:
+            statements = body[1]
+        for statement in statements:
+            statement()
+
+    def __compileCall(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 2)
+        target: callable = self.compile(args[0])
+        arguments: list = args[1]
+        PyTerpreterEnsure.Type(arguments, list)
+        values: tuple = tuple(self.__compileValue(argument) for argument in arguments)
+        interpreter: PyTerpreter = self.__interpreter
+        invoke: callable = PyTerpreterCompiler.__Invoke
+        if not interpreter.trace.enabled:
+            invoke = invoke.__wrapped__
+        return lambda: invoke(interpreter, args, target, values)
+
+    @staticmethod
+    @trace
+    def __Invoke(
+        interpreter: PyTerpreter, args: list, target: callable, values: tuple
+    ) -> any:
+        function: PyTerpreterCallable = target()
+        PyTerpreterEnsure.Instance(function, PyTerpreterCallable)
+        arguments: list = [value() for value in values]
+        return PyTerpreterFunction.Invoke(interpreter, function, arguments)
+
+    def __compileReturn(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 1)
+        value: callable = self.__compileValue(args[0])
+        interpreter: PyTerpreter = self.__interpreter
+
+        def run() -> None:
+            PyTerpreterEnsure.Ensure(
+                interpreter.depth > 0, "Illegal use of return outside function."
+            )
+            raise PyTerpreterReturn(value())
+
+        return run
+
+    def __compileObjectSet(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 3)
+        environment: callable = self.compile(args[0])
+        name: callable = self.__compileName(args[1])
+        value: callable = self.__compileValue(args[2])
+
+        def run() -> Illegal:
+            target: PyTerpreterEnvironment = environment()
+            PyTerpreterEnsure.Instance(target, PyTerpreterEnvironment)
+            target.store(name(), value())
+            return Illegal
+
+        return run
+
+    def __compileObjectGet(self, args: list) -> callable:
+        PyTerpreterEnsure.Length(args, 2)
+        environment: callable = self.compile(args[0])
+        name: callable = self.__compileName(args[1])
+
+        def run() -> any:
+            target: PyTerpreterEnvironment = environment()
+            PyTerpreterEnsure.Instance(target, PyTerpreterEnvironment)
+            return PyTerpreterObject.Member(target, name())
+
+        return run
+
+
+class PyTerpreterValue:
+    """An argument already evaluated by the stack machine, handed to a handler."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: any) -> None:
+        self.value: any = value
+
+
+class PyTerpreterMachine:
+    """
+    Evaluates programs with an explicit work stack instead of python recursion.
+    Every operation in progress is a generator on the stack, it yields the
+    programs it needs evaluated and is sent their values. Sequences, control
+    flow, calls and returns are implemented here, every other operator gets
+    its arguments evaluated first and handed to its handler as values.
+    A returned call releases the frame of the returning function before the
+    call is made, so tail recursion runs in constant memory.
+    """
+
+    # operators taking unevaluated arguments, their handlers evaluate what they need
+    Raw: frozenset = frozenset({"function", "class", "object"})
+
+    def __init__(self, interpreter: PyTerpreter, operations: dict) -> None:
+        self.__interpreter: PyTerpreter = interpreter
+        self.__operations: dict = operations
+        self.__natives: dict = {
+            "if": self.__if,
+            "while": self.__while,
+            "repeat": self.__repeat,
+            "call": self.__call,
+            "return": self.__return,
+        }
+
+    def run(
+        self,
+        program: any,
+        usage: str | None = None,
+        preserve: bool = False,
+        environment: PyTerpreterEnvironment | None = None,
+    ) -> any:
+        PyTerpreterEnsure.NotIllegal(program)
+        if not isinstance(program, list):
+            return program
+        if len(program) == 0 or isinstance(program[0], list):
+            return self.__drive(self.__sequence(program, usage, preserve, environment))
+        return self.__drive(self.__operation(program))
+
+    def runFunction(self, function: PyTerpreterCallable) -> None:
+        self.__drive(self.__body(function.program))
+
+    def __drive(self, generator: types.GeneratorType) -> any:
+        stack: list[types.GeneratorType] = [generator]
+        value: any = None
+        error: BaseException | None = None
+        while stack:
+            try:
+                if error is None:
+                    request: any = stack[-1].send(value)
+                else:
+                    pending, error = error, None
+                    request = stack[-1].throw(pending)
+            except StopIteration as done:
+                stack.pop()
+                value = done.value
+                continue
+            except BaseException as raised:
+                stack.pop()
+                if not stack:
+                    raise
+                error = raised
+                continue
+            value = None
+            if type(request) is types.GeneratorType:
+                stack.append(request)
+            elif not isinstance(request, list):
+                PyTerpreterEnsure.NotIllegal(request)
+                value = request
+            elif len(request) == 0 or isinstance(request[0], list):
+                stack.append(self.__sequence(request, None, False, None))
+            else:
+                stack.append(self.__operation(request))
+        return value
+
+    def __operation(self, program: list) -> types.GeneratorType:
+        operator: str = program[0]
+        if not self.__interpreter.validated:
+            PyTerpreterEnsure.Type(operator, str)
+        native: callable | None = self.__natives.get(operator)
+        if native is not None:
+            return native(program[1:])
+        if operator not in self.__operations:
+            PyTerpreterEnsure.Includes(operator, self.__operations)
+        handler: callable = self.__operations[operator]
+        if operator in PyTerpreterMachine.Raw:
+            return self.__raw(handler, program[1:])
+        return self.__strict(handler, program[1:])
+
+    def __raw(self, handler: callable, args: list) -> types.GeneratorType:
+        yield from ()
+        return handler(self.__interpreter, args)
+
+    def __strict(self, handler: callable, args: list) -> types.GeneratorType:
+        values: list[PyTerpreterValue] = []
+        for arg in args:
+            values.append(PyTerpreterValue((yield arg)))
+        return handler(self.__interpreter, values)
+
+    def __sequence(
+        self,
+        sequence: list,
+        usage: str | None,
+        preserve: bool,
+        target: PyTerpreterEnvironment | None,
+    ) -> types.GeneratorType:
+        if not self.__interpreter.validated:
+            PyTerpreterEnsure.Sequence(sequence)
+        environment: PyTerpreterEnvironment = (
+            target or self.__interpreter.autoEnvironment(usage)
+        )
+        try:
+            for program in sequence:
+                yield program
+        finally:
+            if preserve:
+                environment.detach()
+            else:
+                environment.destroy()
+        return environment if preserve else None
+
+    def __body(self, program: list) -> types.GeneratorType:
+        for statement in program:
+            yield statement
+
+    def __if(self, args: list) -> types.GeneratorType:
+        length: int = PyTerpreterEnsure.Length(args, (2, 3))
+        condition: any = yield args[0]
+        PyTerpreterEnsure.NotIllegal(condition)
+        if condition:
+            yield self.__sequence(args[1], "if", False, None)
+        elif length == 3:
+            yield self.__sequence(args[2], "if", False, None)
+        return Illegal
+
+    def __while(self, args: list) -> types.GeneratorType:
+        PyTerpreterEnsure.Length(args, 2)
+        if not self.__interpreter.validated:
+            PyTerpreterEnsure.Sequence(args[1])
+        while True:
+            condition: any = yield args[0]
+            PyTerpreterEnsure.NotIllegal(condition)
+            if not condition:
+                return Illegal
+            yield self.__sequence(args[1], "while", False, None)
+
+    def __repeat(self, args: list) -> types.GeneratorType:
+        PyTerpreterEnsure.Length(args, 2)
+        count: int = args[0]
+        if not self.__interpreter.validated:
+            PyTerpreterEnsure.Type(count, int)
+            PyTerpreterEnsure.Sequence(args[1])
+        for _ in range(count):
+            yield self.__sequence(args[1], "repeat", False, None)
+        return Illegal
+
+    def __callee(self, args: list) -> types.GeneratorType:
+        PyTerpreterEnsure.Length(args, 2)
+        function: PyTerpreterCallable = yield args[0]
+        PyTerpreterEnsure.Instance(function, PyTerpreterCallable)
+        arguments: list = args[1]
+        PyTerpreterEnsure.Type(arguments, list)
+        values: list = []
+        for argument in arguments:
+            value: any = yield argument
+            PyTerpreterEnsure.NotIllegal(value)
+            values.append(value)
+        return function, values
+
+    def __call(self, args: list) -> types.GeneratorType:
+        function, values = yield from self.__callee(args)
+        interpreter: PyTerpreter = self.__interpreter
+        tracer: PyTerpreterTrace = interpreter.trace
+        identity: int = (
+            tracer.beforeCall(tracer.getFunctionName(args)) if tracer.enabled else 0
+        )
+        carried: list[PyTerpreterEnvironment] = []
+        owned: list[PyTerpreterEnvironment] = []
+        try:
+            while True:
+                frame: tuple = PyTerpreterFunction.Enter(interpreter, function, values)
+                try:
+                    for statement in function.program:
+                        yield statement
+                    return None
+                except PyTerpreterReturn as signal:
+                    return signal.value
+                except PyTerpreterTailCall as tail:
+                    call, function, values = tail.call, tail.function, tail.values
+                    frame = PyTerpreterFunction.Carry(frame, function, carried, owned)
+                finally:
+                    PyTerpreterFunction.Leave(interpreter, *frame)
+                # the tail call replaces the returning call in the trace as well,
+                # with sampling it is recorded whenever it is sampled itself
+                if tracer.enabled:
+                    tracer.afterCall(identity)
+                    identity = 0
+                    identity = tracer.beforeCall(tracer.getFunctionName(call))
+        finally:
+            tracer.afterCall(identity)
+            PyTerpreterFunction.Release(carried, owned)
+
+    def __return(self, args: list) -> types.GeneratorType:
+        PyTerpreterEnsure.Ensure(
+            self.__interpreter.depth > 0, "Illegal use of return outside function."
+        )
+        PyTerpreterEnsure.Length(args, 1)
+        value: any = args[0]
+        if isinstance(value, list) and len(value) > 0 and value[0] == "call":
+            function, values = yield from self.__callee(value[1:])
+            raise PyTerpreterTailCall(value[1:], function, values)
+        result: any = yield value
+        PyTerpreterEnsure.NotIllegal(result)
+        raise PyTerpreterReturn(result)
+
+
+class PyTerpreterOptimizer:
+    """
+    Validates and optimizes a loaded program once, before it is executed.
+    Every structural error is collected with the path of its node and they
+    are reported together. Math and boolean operations on literals are
+    folded, so literal work inside loops is done once instead of on every
+    iteration, and statements with literal conditions that never run or
+    have no effect are removed. The executors skip their structural checks
+    on programs that went through this pass.
+    """
+
+    # argument kinds of every operator, one tuple per allowed argument count
+    Signatures: dict[str, tuple[tuple[str, ...], ...]] = {
+        **{operator: (("value",),) for operator in PyTerpreterCompiler.Unary},
+        **{operator: (("value", "value"),) for operator in PyTerpreterCompiler.Binary},
+        "set": (("name", "value"),),
+        "get": (("name",),),
+        "print": (("value",),),
+        "if": (("value", "sequence"), ("value", "sequence", "sequence")),
+        "dictionary": ((),),
+        "dictionarySet": (("value", "value", "value"),),
+        "dictionaryGet": (("value", "value"),),
+        "dictionaryMerge": (("value", "value"),),
+        "array": (("value",),),
+        "arraySet": (("value", "value", "value"),),
+        "arrayGet": (("value", "value"),),
+        "arrayTyped": (("value", "value"),),
+        "arrayLength": (("value",),),
+        "arrayFill": (("value", "value"),),
+        "arrayRange": (("value", "value"), ("value", "value", "value")),
+        "arraySlice": (("value", "value", "value"),),
+        "arrayConcat": (("value", "value"),),
+        "arrayAdd": (("value", "value"),),
+        "arrayMultiply": (("value", "value"),),
+        "arrayCompare": (("value", "value", "value"),),
+        "arraySum": (("value",),),
+        "arrayMin": (("value",),),
+        "arrayMax": (("value",),),
+        "arraySort": (("value",),),
+        "arrayMap": (("value", "value"),),
+        "while": (("value", "sequence"),),
+        "repeat": (("count", "sequence"),),
+        "function": (("parameters", "sequence"),),
+        "call": (("value", "arguments"),),
+        "return": (("value",),),
+        "class": (("class",), ("value", "class")),
+        "inherit": (("name",),),
+        "object": (("value", "arguments"),),
+        "objectSet": (("value", "name", "value"),),
+        "objectGet": (("value", "name"),),
+    }
+
+    Literals: tuple = (int, float, str, bool, type(None))
+
+    # folding stops where a literal result would grow beyond this many bits
+    # or characters
+    Limit: int = 65536
+
+    def __init__(self) -> None:
+        self.errors: list[str] = []
+        self.__arguments: dict = {
+            "value": self.__program,
+            "name": self.__name,
+            "sequence": self.__sequence,
+            "count": self.__count,
+            "parameters": self.__parameters,
+            "arguments": self.__values,
+            "class": self.__class,
+        }
+
+    def optimize(self, program: any) -> any:
+        optimized: any = self.__program(program, "$")
+        PyTerpreterEnsure.Ensure(
+            not self.errors,
+            f"Program validation failed ({len(self.errors)} errors)."
+            + "".join(f"\n  {error}" for error in self.errors),
+        )
+        return optimized
+
+    def __check(self, path: str, check: callable, *args) -> bool:
+        try:
+            check(*args)
+        except SystemExit as error:
+            self.errors.append(f"{path}: {str(error).removeprefix('PyTerpreter: ')}")
+            return False
+        return True
+
+    def __program(self, program: any, path: str) -> any:
+        if not isinstance(program, list):
+            self.__check(path, PyTerpreterEnsure.NotIllegal, program)
+            return program
+        if len(program) == 0 or isinstance(program[0], list):
+            return self.__sequence(program, path)
+        return self.__operation(program, path, False)
+
+    def __sequence(self, sequence: any, path: str) -> any:
+        if not self.__check(path, PyTerpreterEnsure.Type, sequence, list):
+            return sequence
+        statements: list = []
+        for index, statement in enumerate(sequence):
+            location: str = f"{path}[{index}]"
+            if not self.__check(location, PyTerpreterEnsure.Type, statement, list):
+                continue
+            if len(statement) == 0 or isinstance(statement[0], list):
+                statement = self.__sequence(statement, location)
+            else:
+                statement = self.__operation(statement, location, True)
+            # removed statements and empty sequences have no effect
+            if statement is not None and statement != []:
+                statements.append(statement)
+        return statements
+
+    def __operation(self, program: list, path: str, statement: bool) -> any:
+        operator: str = program[0]
+        if not self.__check(f"{path}[0]", PyTerpreterEnsure.Type, operator, str):
+            return program
+        signatures: tuple | None = PyTerpreterOptimizer.Signatures.get(operator)
+        if signatures is None:
+            self.errors.append(
+                f"{path}[0]: Non-existent operation occurred ({operator})."
+            )
+            return program
+        args: list = program[1:]
+        lengths: tuple[int, ...] = tuple(len(kinds) for kinds in signatures)
+        length: tuple[int, ...] | int = lengths if len(lengths) > 1 else lengths[0]
+        if not self.__check(path, PyTerpreterEnsure.Length, args, length):
+            return program
+        kinds: tuple[str, ...] = signatures[lengths.index(len(args))]
+        values: list = [
+            self.__arguments[kind](arg, f"{path}[{index}]")
+            for index, (kind, arg) in enumerate(zip(kinds, args), 1)
+        ]
+        folded: any = self.__fold(operator, values)
+        if folded is not None:
+            # a literal has no effect as a statement
+            return None if statement else folded
+        if statement:
+            return self.__branch(operator, values)
+        return [operator, *values]
+
+    def __fold(self, operator: str, values: list) -> any:
+        function: callable | None = PyTerpreterCompiler.Unary.get(
+            operator, PyTerpreterCompiler.Binary.get(operator)
+        )
+        if function is None or not all(
+            type(value) in PyTerpreterOptimizer.Literals for value in values
+        ):
+            return None
+        if not PyTerpreterOptimizer.__Bounded(operator, values):
+            return None
+        try:
+            result: any = function(*values)
+        except Exception:
+            # the error is raised when the operation is reached at runtime
+            return None
+        if result is None or type(result) not in PyTerpreterOptimizer.Literals:
+            return None
+        return None if result == Illegal else result
+
+    @staticmethod
+    def __Bounded(operator: str, values: list) -> bool:
+        if operator == "power" and all(type(value) is int for value in values):
+            return abs(values[1]) * values[0].bit_length() <= PyTerpreterOptimizer.Limit
+        if operator == "multiply" and str in map(type, values):
+            text, count = values if type(values[0]) is str else reversed(values)
+            return (
+                type(count) is not int
+                or len(text) * count <= PyTerpreterOptimizer.Limit
+            )
+        return True
+
+    def __branch(self, operator: str, values: list) -> any:
+        if operator == "if" and not isinstance(values[0], list):
+            # the taken instructions stay a sequence with their own environment
+            if values[0]:
+                return values[1]
+            return values[2] if len(values) == 3 else None
+        if operator == "while" and not isinstance(values[0], list) and not values[0]:
+            return None
+        if operator == "repeat" and type(values[0]) is int and values[0] <= 0:
+            return None
+        return [operator, *values]
+
+    def __name(self, name: any, path: str) -> any:
+        name = self.__program(name, path)
+        if not isinstance(name, list):
+            self.__check(path, PyTerpreterEnsure.Type, name, str)
+        return name
+
+    def __count(self, count: any, path: str) -> any:
+        self.__check(path, PyTerpreterEnsure.Type, count, int)
+        return count
+
+    def __parameters(self, parameters: any, path: str) -> any:
+        if self.__check(path, PyTerpreterEnsure.Type, parameters, list):
+            for index, parameter in enumerate(parameters):
+                self.__check(f"{path}[{index}]", PyTerpreterEnsure.Type, parameter, str)
+        return parameters
+
+    def __values(self, values: any, path: str) -> any:
+        if not self.__check(path, PyTerpreterEnsure.Type, values, list):
+            return values
+        return [
+            self.__program(value, f"{path}[{index}]")
+            for index, value in enumerate(values)
+        ]
+
+    def __class(self, program: any, path: str) -> any:
+        if not self.__check(path, PyTerpreterEnsure.Type, program, list):
+            return program
+        operations: list = []
+        for index, operation in enumerate(program):
+            location: str = f"{path}[{index}]"
+            if not (
+                self.__check(location, PyTerpreterEnsure.Type, operation, list)
+                and self.__check(location, PyTerpreterEnsure.Length, operation, 3)
+                and self.__check(
+                    location, PyTerpreterEnsure.Operation, operation, "set"
+                )
+            ):
+                continue
+            name: any = operation[1]
+            if not (
+                self.__check(f"{location}[1]", PyTerpreterEnsure.Type, name, str)
+                and self.__check(f"{location}[1]", PyTerpreterEnsure.NotIllegal, name)
+            ):
+                continue
+            value: any = self.__program(operation[2], f"{location}[2]")
+            if name == "constructor" and not PyTerpreterClassTable.IsFunction(value):
+                self.errors.append(
+                    f"{location}[2]: Illegal constructor, it must be a function."
+                )
+            operations.append(["set", name, value])
+        return operations
+
+
+class PyTerpreter:
+    def __init__(
+        self,
+        compiled: bool = False,
+        trace: str | None = None,
+        sample: int = 1,
+        stack: bool = False,
+        depth: int | None = None,
+    ) -> None:
+        PyTerpreterEnsure.Ensure(
+            not (compiled and stack), "Illegal combination of --compile and --stack."
+        )
+        PyTerpreterEnsure.Ensure(
+            depth is None or depth > 0, f"Invalid maximum call depth ({depth})."
+        )
+        self.environment: PyTerpreterEnvironment = PyTerpreterEnvironment.Root("global")
+        self.scope: PyTerpreterScope = self.environment.scope
+        self.depth: int = 0
+        self.maxDepth: int = sys.maxsize if depth is None else depth
+        # print target, None writes to the current sys.stdout
+        self.output: any = None
+        # set once a program passed the optimizer,
+        # the handlers skip their structural checks
+        self.validated: bool = False
         self.__operations: dict = {
             **PyTerpreterVariable.Operations,
             **PyTerpreterMath.Operations,
@@ -904,15 +2241,49 @@ class PyTerpreter:
             **PyTerpreterClass.Operations,
             **PyTerpreterObject.Operations,
         }
+        self.trace = PyTerpreterTrace(trace, sample)
+        self.compiler = PyTerpreterCompiler(self, self.__operations)
+        self.machine: PyTerpreterMachine | None = (
+            PyTerpreterMachine(self, self.__operations) if stack else None
+        )
+        self.__compiled: bool = compiled
 
-        self.trace = PyTerpreterTrace(cliArgs)
-        self.execute(self.__load(cliArgs))
-        self.trace.postExecution()
+    @staticmethod
+    def Main(cliArgs: list[str]) -> None:
+        arguments: PyTerpreterArguments = PyTerpreterArguments(cliArgs)
+        program: PyTerpreterProgram = PyTerpreterProgram.Load(
+            arguments.file,
+            compiled=arguments.option("--compile", False),
+            cache=arguments.option("--cache"),
+            trace=arguments.option("--trace"),
+            sample=arguments.number("--sample", 1),
+            stack=arguments.option("--stack", False),
+            depth=arguments.number("--depth"),
+        )
+        try:
+            if arguments.option("--dump") is not None:
+                program.dump(arguments.option("--dump"))
+            program.run(capture=False)
+        finally:
+            program.close()
+
+    def load(self, program: any, validated: bool = False) -> callable:
+        if not validated:
+            program = PyTerpreterOptimizer().optimize(program)
+        self.validated = True
+        if self.__compiled:
+            return self.compiler.compileProgram(program)
+        return lambda: self.execute(
+            program, preserve=True, environment=self.environment
+        )
 
-    def __load(self, cliArgs: list[str]) -> any:
-        PyTerpreterEnsure.Length(cliArgs, (2, 4))
-        with open(sys.argv[1], "r") as reader:
-            return json.load(reader)
+    def reset(self) -> None:
+        # a failed run can leave environments attached below the root
+        while self.scope.lowest is not self.environment:
+            self.scope.lowest.detach()
+        for name in list(self.environment.fields):
+            self.environment.delete(name)
+        self.depth = 0
 
     def execute(
         self,
@@ -920,21 +2291,30 @@ class PyTerpreter:
         usage: str | None = None,
         preserve: bool = False,
         environment: PyTerpreterEnvironment | None = None,
-        mount: PyTerpreterEnvironment | None = None,
     ) -> any:
+        if type(program) is PyTerpreterValue:
+            return program.value
+        if self.machine is not None:
+            return self.machine.run(program, usage, preserve, environment)
         PyTerpreterEnsure.NotIllegal(program)
         if isinstance(program, list):
-            if isinstance(program[0], list):
-                return self.__executeSequence(
-                    program, usage, preserve, environment, mount
-                )
+            if len(program) == 0 or isinstance(program[0], list):
+                return self.__executeSequence(program, usage, preserve, environment)
             else:
                 return self.__executeOperation(program)
         else:
             return program
 
+    def executeFunction(self, function: PyTerpreterCallable) -> None:
+        if self.__compiled:
+            return self.compiler.executeFunction(function)
+        if self.machine is not None:
+            return self.machine.runFunction(function)
+        for program in function.program:
+            self.execute(program)
+
     def autoEnvironment(self, usage: str | None) -> PyTerpreterEnvironment:
-        return PyTerpreterEnvironment(usage or "sequence", self.environment.lowest())
+        return PyTerpreterEnvironment(usage or "sequence", self.scope.lowest)
 
     def __executeSequence(
         self,
@@ -942,40 +2322,193 @@ class PyTerpreter:
         usage: str | None,
         preserve: bool,
         target: PyTerpreterEnvironment | None,
-        mount: PyTerpreterEnvironment | None,
     ) -> any:
-        PyTerpreterEnsure.Sequence(sequence)
-        self.__mountEnvironment(mount)
+        if not self.validated:
+            PyTerpreterEnsure.Sequence(sequence)
         environment: PyTerpreterEnvironment = target or self.autoEnvironment(usage)
-        for program in sequence:
-            if environment.kill:
-                break
-            self.execute(program)
-        if preserve:
-            environment.detach()
-            self.__unmountEnvironment(mount)
-            return environment
-        returnValue: any = None
-        if usage == "function" and environment.exists("return"):
-            returnValue = environment.retrieve("return")
-        environment.destroy()
-        self.__unmountEnvironment(mount)
-        return returnValue
-
-    def __mountEnvironment(self, mount: PyTerpreterEnvironment | None):
-        if mount is not None:
-            mount.attach(self.environment.lowest())
-
-    def __unmountEnvironment(self, mount: PyTerpreterEnvironment | None):
-        if mount is not None:
-            mount.detach()
+        try:
+            for program in sequence:
+                self.execute(program)
+        finally:
+            if preserve:
+                environment.detach()
+            else:
+                environment.destroy()
+        return environment if preserve else None
 
     def __executeOperation(self, program: list) -> any:
         operator: str = program[0]
-        PyTerpreterEnsure.Type(operator, str)
-        PyTerpreterEnsure.Includes(operator, self.__operations)
+        if not self.validated:
+            PyTerpreterEnsure.Type(operator, str)
+            PyTerpreterEnsure.Includes(operator, self.__operations)
         return self.__operations[operator](self, program[1:])
 
 
+class PyTerpreterCache:
+    """
+    On-disk cache of loaded programs keyed by the sha256 of their source.
+    Entries are marshal dumps of the optimized program tree, which load
+    considerably faster than JSON and skip the optimizer. Only programs that
+    validated (and compiled) successfully are stored. The file name carries
+    the cache and marshal format versions.
+    """
+
+    Version: int = 2
+
+    def __init__(self, directory: str) -> None:
+        self.directory: str = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def __path(self, key: str) -> str:
+        return os.path.join(
+            self.directory, f"{key}.{PyTerpreterCache.Version}.{marshal.version}.gscc"
+        )
+
+    def fetch(self, key: str) -> any:
+        try:
+            with open(self.__path(key), "rb") as reader:
+                return marshal.load(reader)
+        except FileNotFoundError:
+            return None
+        except (EOFError, ValueError, TypeError):
+            # a damaged entry is rebuilt by the next store
+            return None
+
+    def store(self, key: str, program: any) -> None:
+        path: str = self.__path(key)
+        temporary: str = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as writer:
+            marshal.dump(program, writer)
+        os.replace(temporary, path)
+
+
+class PyTerpreterResult:
+    __slots__ = ("variables", "output", "overhead", "execution")
+
+    def __init__(
+        self, variables: dict, output: str, overhead: int, execution: int
+    ) -> None:
+        self.variables: dict = variables
+        self.output: str = output
+        self.overhead: int = overhead
+        self.execution: int = execution
+
+    def __repr__(self) -> str:
+        return f"PyTerpreterResult({self.variables}, {self.output!r})"
+
+
+class PyTerpreterProgram:
+    """
+    A program loaded once and run many times. Loading parses and optimizes
+    the source, or fetches the optimized program from the cache, and
+    compiles it. Every run resets the global
+    environment, stores the inputs as globals and returns the globals with
+    the captured output. Startup and run times are recorded in nanoseconds.
+    """
+
+    def __init__(
+        self,
+        source: bytes | str,
+        compiled: bool = True,
+        cache: str | None = None,
+        trace: str | None = None,
+        sample: int = 1,
+        stack: bool = False,
+        depth: int | None = None,
+    ) -> None:
+        start: int = time.perf_counter_ns()
+        if isinstance(source, str):
+            source = source.encode()
+        # the stack machine replaces the compiled closures
+        self.interpreter: PyTerpreter = PyTerpreter(
+            compiled and not stack, trace, sample, stack, depth
+        )
+        store: PyTerpreterCache | None = PyTerpreterCache(cache) if cache else None
+        key: str = hashlib.sha256(source).hexdigest()
+
+        program: any = store.fetch(key) if store is not None else None
+        self.cached: bool = program is not None
+        if not self.cached:
+            program = json.loads(source)
+        loaded: int = time.perf_counter_ns()
+        if not self.cached:
+            program = PyTerpreterOptimizer().optimize(program)
+        optimized: int = time.perf_counter_ns()
+        self.program: any = program
+        self.__run: callable = self.interpreter.load(program, validated=True)
+        if store is not None and not self.cached:
+            store.store(key, program)
+        ready: int = time.perf_counter_ns()
+
+        self.startup: dict[str, int] = {
+            "load": loaded - start,
+            "optimize": optimized - loaded,
+            "compile": ready - optimized,
+            "total": ready - start,
+        }
+        self.runs: int = 0
+        self.__overhead: int = 0
+        self.__execution: int = 0
+
+    @staticmethod
+    def Load(file: str, **options) -> PyTerpreterProgram:
+        with open(file, "rb") as reader:
+            return PyTerpreterProgram(reader.read(), **options)
+
+    def run(
+        self, inputs: dict | None = None, capture: bool = True
+    ) -> PyTerpreterResult:
+        start: int = time.perf_counter_ns()
+        interpreter: PyTerpreter = self.interpreter
+        interpreter.reset()
+        for name, value in (inputs or {}).items():
+            interpreter.environment.store(name, value)
+        output: io.StringIO | None = io.StringIO() if capture else None
+        interpreter.output = output
+        ready: int = time.perf_counter_ns()
+        try:
+            self.__run()
+        except RecursionError:
+            PyTerpreterEnsure.Ensure(
+                False,
+                "Python recursion limit reached, run deep recursion with --stack.",
+            )
+        finally:
+            finished: int = time.perf_counter_ns()
+            interpreter.output = None
+            interpreter.trace.flush()
+
+        result: PyTerpreterResult = PyTerpreterResult(
+            dict(interpreter.environment.fields),
+            output.getvalue() if capture else "",
+            0,
+            finished - ready,
+        )
+        result.overhead = time.perf_counter_ns() - start - result.execution
+        self.runs += 1
+        self.__overhead += result.overhead
+        self.__execution += result.execution
+        return result
+
+    @property
+    def statistics(self) -> dict:
+        runs: int = max(self.runs, 1)
+        return {
+            "cached": self.cached,
+            "startup": self.startup,
+            "runs": self.runs,
+            "overhead": self.__overhead // runs,
+            "execution": self.__execution // runs,
+        }
+
+    def dump(self, file: str) -> None:
+        with open(file, "w") as writer:
+            json.dump(self.program, writer, indent=4)
+            writer.write("\n")
+
+    def close(self) -> None:
+        self.interpreter.trace.postExecution()
+
+
 if __name__ == "__main__":
-    PyTerpreter(sys.argv)
+    PyTerpreter.Main(sys.argv)
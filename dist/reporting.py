@@ -1,14 +1,40 @@
 import sys
-from datetime import datetime
+from array import array
+
+
+class TraceNode:
+    __slots__ = ("name", "calls", "inclusiveTime", "selfTime", "children")
+
+    def __init__(self, name: str) -> None:
+        self.name: str = name
+        self.calls: int = 0
+        self.inclusiveTime: int = 0
+        self.selfTime: int = 0
+        self.children: dict[str, TraceNode] = {}
+
+    def child(self, name: str) -> "TraceNode":
+        node: TraceNode | None = self.children.get(name)
+        if node is None:
+            node = self.children[name] = TraceNode(name)
+        return node
 
 
 class TraceReporter:
+    Header: str = "#PyTerpreterTrace 2"
+    Percentiles: tuple[int, ...] = (50, 95, 99)
+
     def __init__(self, traceFile: str):
         self.traceFile: str = traceFile
-        self.functions: dict[str, dict[str, [int | float | datetime]]] = {}
+        self.functions: dict[str, dict[str, int | array]] = {}
+        self.tree: TraceNode = TraceNode("[root]")
 
-        lines: list[str] = self.__readFile()
-        self.__processTraceData(lines)
+        self.__names: dict[str, str] = {}
+        # open calls: id -> [name, start, children time, tree node, parent id]
+        self.__open: dict[str, list] = {}
+        # number of open calls per name, to count recursion only once
+        self.__active: dict[str, int] = {}
+
+        self.__processTraceData()
         self.__generateReport()
 
     @staticmethod
@@ -20,58 +46,120 @@ class TraceReporter:
             rightPadding += 1
         return leftPadding, rightPadding
 
-    def __readFile(self) -> list[str]:
-        with open(self.traceFile, "r") as file:
-            lines: list[str] = file.readlines()
-
-        return lines
-
-    def __processTraceData(self, lines: list[str]) -> None:
-        for line in lines:
-            functionID, funtionName, event, timestampStr = map(
-                str.strip, line.split(",")
-            )
+    @staticmethod
+    def __milliseconds(nanoseconds: int | float) -> float:
+        return nanoseconds / 1_000_000
 
-            timestamp: datetime = datetime.strptime(
-                timestampStr, "%Y-%m-%d %H:%M:%S.%f"
-            )
+    def __processTraceData(self) -> None:
+        with open(self.traceFile, "r") as file:
+            header: str = file.readline().strip()
+            if header != TraceReporter.Header:
+                raise SystemExit(f"Unsupported trace file format ({header}).")
+            for line in file:
+                if line.startswith("n "):
+                    _, nameId, name = line.rstrip("\n").split(" ", 2)
+                    self.__names[nameId] = name
+                    continue
+                record: list[str] = line.split()
+                if record[0] == "s":
+                    self.__start(record[1], record[2], record[3], int(record[4]))
+                elif record[0] == "e":
+                    self.__stop(record[1], int(record[2]))
+
+    def __start(self, identity: str, parent: str, nameId: str, timestamp: int) -> None:
+        name: str = self.__names[nameId]
+        parentCall: list | None = self.__open.get(parent)
+        parentNode: TraceNode = self.tree if parentCall is None else parentCall[3]
+        self.__open[identity] = [name, timestamp, 0, parentNode.child(name), parent]
+        self.__active[name] = self.__active.get(name, 0) + 1
+
+        if name not in self.functions:
+            self.functions[name] = {
+                "calls": 0,
+                "inclusiveTime": 0,
+                "selfTime": 0,
+                "durations": array("q"),
+            }
+
+    def __stop(self, identity: str, timestamp: int) -> None:
+        name, startTime, childrenTime, node, parent = self.__open.pop(identity)
+        elapsedTime: int = timestamp - startTime
+        selfTime: int = elapsedTime - childrenTime
+        self.__active[name] -= 1
+
+        data: dict = self.functions[name]
+        data["calls"] += 1
+        data["selfTime"] += selfTime
+        data["durations"].append(elapsedTime)
+        # nested recursive calls are already part of the outermost call
+        if self.__active[name] == 0:
+            data["inclusiveTime"] += elapsedTime
+
+        node.calls += 1
+        node.inclusiveTime += elapsedTime
+        node.selfTime += selfTime
+
+        parentCall: list | None = self.__open.get(parent)
+        if parentCall is not None:
+            parentCall[2] += elapsedTime
 
-            if funtionName not in self.functions:
-                self.functions[funtionName] = {
-                    "calls": 0,
-                    "totalTime": 0,
-                    "startTime": None,
-                }
-
-            if event == "start":
-                self.functions[funtionName]["startTime"] = timestamp
-            elif event == "stop":
-                startTime: datetime = self.functions[funtionName]["startTime"]
-                elapsedTime: float = (timestamp - startTime).total_seconds() * 1000
-                self.functions[funtionName]["totalTime"] += elapsedTime
-                self.functions[funtionName]["calls"] += 1
+    @staticmethod
+    def __percentile(durations: list[int], percentile: int) -> int:
+        index: int = max(0, -(-len(durations) * percentile // 100) - 1)
+        return durations[index]
 
     def __generateReport(self) -> None:
+        if not self.functions:
+            print("No calls traced.")
+            return
         maxNameLength: int = max(len(name) for name in self.functions.keys())
         maxSeperatorLength: int = max(maxNameLength, 13)
 
         leftPadding, rightPadding = self.__calculatePadding(maxSeperatorLength)
+        percentiles: str = "".join(
+            f" {f'p{percentile} (ms)':<11} |" for percentile in TraceReporter.Percentiles
+        )
 
         print(
-            f"|{' ' * leftPadding}Function Name{' ' * rightPadding} | Num. of calls  |  Total Time (ms) |  Average Time (ms)  |"
+            f"|{' ' * leftPadding}Function Name{' ' * rightPadding} | Num. of calls  |  Total Time (ms) |   Self Time (ms) |  Average Time (ms)  |{percentiles}"
         )
         print(
-            f"|{'-' * (maxSeperatorLength + 2)}|----------------|------------------|---------------------|"
+            f"|{'-' * (maxSeperatorLength + 2)}|----------------|------------------|------------------|---------------------|"
+            + "-------------|" * len(TraceReporter.Percentiles)
         )
 
         for function_name, data in self.functions.items():
             numCalls: int = data["calls"]
-            totalTime: float = data["totalTime"]
-            averageTime: float = totalTime / numCalls
+            totalTime: float = self.__milliseconds(data["inclusiveTime"])
+            selfTime: float = self.__milliseconds(data["selfTime"])
+            durations: list[int] = sorted(data["durations"])
+            averageTime: float = self.__milliseconds(sum(durations) / numCalls)
+            latencies: str = "".join(
+                f" {self.__milliseconds(self.__percentile(durations, percentile)):<11.3f} |"
+                for percentile in TraceReporter.Percentiles
+            )
+
+            print(
+                f"| {function_name:<{maxSeperatorLength}} | {numCalls:<14} | {totalTime:<16.3f} | {selfTime:<16.3f} | {averageTime:<19.3f} |{latencies}"
+            )
 
+        print()
+        print("Call Tree (calls, total ms, self ms):")
+        self.__printTree()
+
+    def __printTree(self) -> None:
+        # iterative, deep recursion in the trace would exceed the python stack
+        stack: list[tuple[TraceNode, int]] = [
+            (child, 0) for child in reversed(self.tree.children.values())
+        ]
+        while stack:
+            node, depth = stack.pop()
             print(
-                f"| {function_name:<{maxNameLength}} | {numCalls:<14} | {totalTime:<16.3f} | {averageTime:<19.3f} |"
+                f"{'  ' * depth}{node.name} ({node.calls}, "
+                f"{self.__milliseconds(node.inclusiveTime):.3f}, "
+                f"{self.__milliseconds(node.selfTime):.3f})"
             )
+            stack.extend((child, depth + 1) for child in reversed(node.children.values()))
 
 
 if __name__ == "__main__":